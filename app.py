@@ -5,7 +5,9 @@
 
 from flask import Flask, jsonify, request, send_from_directory, Response
 from flask_cors import CORS
+from werkzeug.datastructures import MultiDict
 import pandas as pd
+import numpy as np
 import json
 import os
 import requests
@@ -13,6 +15,12 @@ from datetime import datetime, timedelta
 import random
 from io import StringIO
 import traceback
+import threading
+import re
+import tempfile
+import hashlib
+from collections import OrderedDict
+from journal import MutationJournal, ensure_private_dir, write_frame, read_frame
 
 app = Flask(__name__)
 CORS(app)
@@ -22,18 +30,316 @@ patients_df = None
 dashboard_stats = None
 growth_metrics = None
 
+# Guards the globals above so multi-part reads see one consistent dataset
+data_lock = threading.RLock()
+
+# Bumped on every change to patients_df; derived data is cached per version
+data_version = 0
+# (data_version, day) the KPIs were computed for
+kpi_version = None
+
+# Room -> occupant row positions, rebuilt when the data is replaced and kept
+# current in place by the write routes (see index_room_mutation)
+room_index = {}
+room_index_version = None
+
+# Normalized identity hash of every row, aligned with patients_df positions and
+# kept current in place by the write routes (see index_identity_mutation)
+identity_keys = None
+identity_keys_version = None
+# How many rows share each identity hash, so a new admission is checked with one dict lookup
+identity_counts = {}
+
+# Parsed analytics columns for the current data_version, and memoized
+# /api/analytics results keyed by (view, filters), at most ANALYTICS_CACHE_SIZE
+analytics_cohort = None
+analytics_cohort_version = None
+analytics_cache = OrderedDict()
+ANALYTICS_CACHE_SIZE = int(os.environ.get('ANALYTICS_CACHE_SIZE', 128))
+
+# Columns that identify a patient, and what ingest does with repeats: 'flag' or 'merge'
+DUPLICATE_KEY_FIELDS = ['name', 'phone']
+DUPLICATE_POLICY = os.environ.get('DUPLICATE_POLICY', 'flag').lower()
+
+# Beds per room, and whether add_patient rejects admissions into a full room by default
+ROOM_CAPACITY = int(os.environ.get('ROOM_CAPACITY', 1))
+ENFORCE_ROOM_CAPACITY = os.environ.get('ENFORCE_ROOM_CAPACITY', 'false').lower() == 'true'
+
+# Directory for files the app reads back (journal, snapshots, spilled datasets,
+# the last good sheet payload); created 0700 and owned by the app, never a
+# shared temp directory others could plant files in
+DATA_DIR = os.environ.get('DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+
+# Named datasets beyond the default one: sources as a JSON object of name -> CSV URL,
+# the in-memory budget, and where evicted datasets are spilled
+DEFAULT_DATASET = 'default'
+DATASET_SOURCES = json.loads(os.environ.get('DATASET_SOURCES', '{}'))
+DATASET_CACHE_BUDGET_MB = int(os.environ.get('DATASET_CACHE_BUDGET_MB', 512))
+DATASET_SPILL_DIR = os.environ.get('DATASET_SPILL_DIR', os.path.join(DATA_DIR, 'datasets'))
+
+# Seconds before sheet data is considered stale and revalidated in the background,
+# and where the last good sheet payload is kept so outages and restarts serve it
+SHEET_MAX_AGE = int(os.environ.get('SHEET_MAX_AGE', 300))
+SHEET_CACHE_DIR = os.environ.get('SHEET_CACHE_DIR', os.path.join(DATA_DIR, 'sheets'))
+
+# Write-ahead journal of patient mutations; compacted into a snapshot every
+# JOURNAL_COMPACT_RECORDS mutations
+JOURNAL_ENABLED = os.environ.get('JOURNAL_ENABLED', 'true').lower() == 'true'
+JOURNAL_DIR = os.environ.get('JOURNAL_DIR', os.path.join(DATA_DIR, 'journal'))
+JOURNAL_COMPACT_RECORDS = int(os.environ.get('JOURNAL_COMPACT_RECORDS', 1000))
+
+# One process may write the journal at a time; another waits this many seconds
+# (e.g. while a recycled worker exits) and then refuses to start
+JOURNAL_LOCK_TIMEOUT = int(os.environ.get('JOURNAL_LOCK_TIMEOUT', 30))
+
+# A write route gives up waiting for its mutation's fsync after this many seconds
+JOURNAL_WAIT_TIMEOUT = float(os.environ.get('JOURNAL_WAIT_TIMEOUT', 10))
+
 # Google Sheets CSV URL - Replace this with your Google Sheets published CSV URL
-GOOGLE_SHEETS_CSV_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vSyFf7QSGYYAawZk80QfL30IrehHkCaYGFsj9t8digpFhnOX6DKjRDDWIyARTy2xZF53Qekhp8QuckH/pub?gid=488215142&single=true&output=csv"
+GOOGLE_SHEETS_CSV_URL = os.environ.get('GOOGLE_SHEETS_CSV_URL', "https://docs.google.com/spreadsheets/d/e/2PACX-1vSyFf7QSGYYAawZk80QfL30IrehHkCaYGFsj9t8digpFhnOX6DKjRDDWIyARTy2xZF53Qekhp8QuckH/pub?gid=488215142&single=true&output=csv")
+
+# URL prefixes /api/update-sheets-url and /api/datasets accept; add a local stand-in such as
+# http://127.0.0.1:8765/spreadsheets/ (see sheet_standin.py) for benchmarking
+SHEETS_URL_PREFIXES = tuple(os.environ.get('SHEETS_URL_PREFIXES', 'https://docs.google.com/spreadsheets/').split(','))
+
+def mark_data_changed():
+    """Record that patients_df changed so cached derived data is recomputed"""
+    global data_version
+    
+    with data_lock:
+        data_version += 1
+
+# Journal state; the journal is opened on first use so forked workers get their own flusher
+journal = None
+journal_lock = threading.Lock()
+compaction_thread = None
+
+def get_journal():
+    """Open the mutation journal on first use, or return None if journaling is disabled"""
+    global journal
+    
+    if not JOURNAL_ENABLED:
+        return None
+    with journal_lock:
+        if journal is None:
+            journal = MutationJournal(JOURNAL_DIR, lock_timeout=JOURNAL_LOCK_TIMEOUT)
+        return journal
+
+def close_journal():
+    """Flush and release the journal so another process, such as a forked worker, can open it"""
+    global journal
+    
+    with journal_lock:
+        if journal is not None:
+            journal.close()
+            journal = None
+
+def apply_mutation(df, record, mask=None):
+    """Apply one journaled mutation to a patients dataframe.
+
+    Used both by the write routes and by journal replay, so a mutation has
+    exactly one implementation. Returns the resulting dataframe and the
+    number of affected rows. Bulk mutations accept a precomputed row mask.
+    """
+    op = record['op']
+    if op == 'add':
+        return pd.concat([df, pd.DataFrame([record['patient']])], ignore_index=True), 1
+    if op == 'update':
+        for key, value in record['changes'].items():
+            df.at[record['id'], key] = value
+        return df, 1
+    if op == 'delete':
+        return df.drop(df.index[record['id']]).reset_index(drop=True), 1
+    
+    if mask is None:
+        mask = build_patient_mask(df, record.get('ids'), record.get('filter')).to_numpy()
+    affected = int(mask.sum())
+    if op == 'bulk_update':
+        for key, value in record['changes'].items():
+            df.loc[mask, key] = value
+        return df, affected
+    if op == 'bulk_delete':
+        return (df[~mask].reset_index(drop=True) if affected else df), affected
+    raise ValueError(f'Unknown mutation: {op}')
+
+def record_mutation(record):
+    """Append a mutation to the journal; call while holding data_lock, before applying it.
+
+    Returns the sequence number to pass to wait_for_durability once the lock
+    is released, so concurrent writers share one fsync.
+    """
+    global compaction_thread
+    
+    active_journal = get_journal()
+    if active_journal is None:
+        return None
+    
+    seq = active_journal.append(record)
+    if active_journal.records_since_snapshot >= JOURNAL_COMPACT_RECORDS and not (
+            compaction_thread is not None and compaction_thread.is_alive()):
+        compaction_thread = threading.Thread(target=compact_journal, daemon=True)
+        compaction_thread.start()
+    return seq
+
+def wait_for_durability(seq):
+    """Block until a journaled mutation is on disk"""
+    if seq is not None:
+        get_journal().wait(seq, JOURNAL_WAIT_TIMEOUT)
+
+def compact_journal(replaced=False):
+    """Snapshot patients_df and start a new journal so replay stays short.
 
-def load_dashboard_stats():
-    """Load dashboard statistics data"""
+    Pass replaced=True after swapping in a whole new dataset.
+    """
+    active_journal = get_journal()
+    if active_journal is None or patients_df is None:
+        return
+    
+    with data_lock:
+        df, seq = active_journal.begin_compaction(patients_df, replaced)
+        # Where the data came from, so a restart reports it and knows whether
+        # the sheet may replace it
+        metadata = {
+            'source': data_source['source'],
+            'fetched_at': data_source['fetched_at'].isoformat() if data_source['fetched_at'] else '',
+            'local_changes': sheet_loaded_version != data_version
+        }
+    active_journal.finish_compaction(df, seq, metadata)
+    print(f"Compacted patient journal at mutation {seq}")
+
+def replace_patients(df, source, fetched_at=None, keep_local_edits=False):
+    """Swap in a whole new dataset from source and snapshot it; returns the new data_version.
+
+    Uploaded data counts as a local change, so revalidation never replaces it.
+    With keep_local_edits=True nothing is replaced (and None is returned) if
+    patients_df was edited since it was loaded from the sheet.
+    """
+    global patients_df, sheet_loaded_version
+    
+    with data_lock:
+        if keep_local_edits and sheet_loaded_version != data_version:
+            return None
+        patients_df = df
+        mark_data_changed()
+        data_source.update(source=source, fetched_at=fetched_at)
+        if source != 'upload':
+            sheet_loaded_version = data_version
+        version = data_version
+    compact_journal(replaced=True)
+    return version
+
+def restore_patients_from_journal(include_sample=False):
+    """Rebuild patients_df from the last snapshot plus the journaled mutations after it.
+
+    Sample data is only restored with include_sample=True, for a process that
+    takes over from another one in the same deployment.
+    """
+    global patients_df, sheet_loaded_version
+    
+    active_journal = get_journal()
+    if active_journal is None:
+        return False
+    
+    try:
+        df, records, metadata = active_journal.load()
+    except Exception as e:
+        print(f"Could not read the patient journal: {e}")
+        return False
+    if df is None:
+        return False
+    if metadata.get('source') == 'sample' and not include_sample:
+        # Placeholder data is never worth restoring over a fresh sheet load
+        print(f"Journal holds sample data; discarding it ({len(records)} mutations)")
+        return False
+    
+    for record in records:
+        df, _ = apply_mutation(df, record)
+    
+    fetched_at = metadata.get('fetched_at')
+    with data_lock:
+        patients_df = df
+        mark_data_changed()
+        # Only unedited sheet data may be replaced by revalidation
+        sheet_loaded_version = data_version if not records and metadata.get('local_changes') == 'False' else None
+        data_source.update(
+            source=metadata.get('source') or 'journal',
+            fetched_at=datetime.fromisoformat(fetched_at) if fetched_at else None
+        )
+    print(f"Restored {len(df)} patients from the journal ({len(records)} mutations replayed)")
+    return True
+
+# Disease patterns that assign a patient to a growth metric category;
+# None means every admission counts
+GROWTH_CATEGORIES = {
+    'newPatient': None,
+    'heartSurgeries': r'heart|cardi|coronary|angina|bypass',
+    'medicalTreatment': r'^(?!.*(?:heart|cardi|coronary|angina|bypass)).+'
+}
+
+def get_admission_dates(df):
+    """Parse admitDate to normalized timestamps; unparseable dates become NaT"""
+    return pd.to_datetime(df['admitDate'], errors='coerce').dt.normalize()
+
+def count_admission_windows(admit_dates, as_of):
+    """Build one boolean column per reporting window for a series of admit dates"""
+    month_start = as_of.replace(day=1)
+    previous_month_start = month_start - pd.DateOffset(months=1)
+    year_start = as_of.replace(month=1, day=1)
+    previous_year_start = year_start - pd.DateOffset(years=1)
+    
+    return pd.DataFrame({
+        'today': admit_dates == as_of,
+        'yesterday': admit_dates == as_of - pd.Timedelta(days=1),
+        'this_month': (admit_dates >= month_start) & (admit_dates <= as_of),
+        'previous_month': (admit_dates >= previous_month_start) & (admit_dates < month_start),
+        'this_year': (admit_dates >= year_start) & (admit_dates <= as_of),
+        'previous_year': (admit_dates >= previous_year_start) & (admit_dates < year_start)
+    })
+
+def format_growth(current, previous):
+    """Format period-over-period growth as a signed percentage"""
+    if previous:
+        growth = round((current - previous) / previous * 100)
+    else:
+        growth = 100 if current else 0
+    return f'{growth:+d}%'
+
+def window_progress(current, previous):
+    """Progress bar width comparing a window to the one before it"""
+    peak = max(current, previous)
+    return round(current / peak * 100) if peak else 0
+
+def load_dashboard_stats(as_of=None):
+    """Compute dashboard statistics from the patient data as of a day (default today)"""
     global dashboard_stats
     
     try:
+        df = patients_df if patients_df is not None else create_sample_data()
+        as_of = pd.Timestamp.today().normalize() if as_of is None else as_of
+        counts = count_admission_windows(get_admission_dates(df), as_of).sum()
+        
+        total = len(df)
+        if 'roomNo' in df.columns:
+            outpatients = int(df['roomNo'].isna().sum() + (df['roomNo'].astype(str).str.strip() == '').sum())
+        else:
+            outpatients = total
+        opd_share = round(outpatients / total * 100) if total else 0
+        year_share = round(counts['this_year'] / total * 100) if total else 0
+        
         dashboard_stats = pd.DataFrame({
             'csvmetric': ['newPatients', 'opdPatients', 'operations', 'visitors'],
-            'value': ['234', '89%', '45', '25000'],
-            'progress': [75, 89, 60, 85],
+            'value': [
+                str(counts['this_month']),
+                f'{opd_share}%',
+                str(counts['today']),
+                str(total)
+            ],
+            'progress': [
+                window_progress(counts['this_month'], counts['previous_month']),
+                opd_share,
+                window_progress(counts['today'], counts['yesterday']),
+                year_share
+            ],
             'color': ['#2e9e5b', '#e74c3c', '#2e9e5b', '#f39c12']
         })
         
@@ -43,19 +349,34 @@ def load_dashboard_stats():
         print(f"Error loading dashboard stats: {e}")
         return False
 
-def load_growth_metrics():
-    """Load growth metrics data"""
+def load_growth_metrics(as_of=None):
+    """Compute growth metrics per category from the patient data as of a day (default today)"""
     global growth_metrics
     
     try:
-        growth_metrics = pd.DataFrame({
-            'csvmetric': ['newPatient', 'heartSurgeries', 'medicalTreatment'],
-            'growth_text': ['+12%', '-5%', '+8%'],
-            'growth_type': ['positive', 'negative', 'positive'],
-            'overall': ['75%', '78%', '92%'],
-            'monthly': ['52%', '8%', '15%'],
-            'day': ['12%', '1%', '3%']
-        })
+        df = patients_df if patients_df is not None else create_sample_data()
+        as_of = pd.Timestamp.today().normalize() if as_of is None else as_of
+        windows = count_admission_windows(get_admission_dates(df), as_of)
+        diseases = df['disease'].astype(str) if 'disease' in df.columns else pd.Series('', index=df.index)
+        
+        rows = []
+        for metric, pattern in GROWTH_CATEGORIES.items():
+            if pattern is None:
+                counts = windows.sum()
+            else:
+                counts = windows[diseases.str.contains(pattern, case=False, regex=True).to_numpy()].sum()
+            
+            monthly = format_growth(counts['this_month'], counts['previous_month'])
+            rows.append({
+                'csvmetric': metric,
+                'growth_text': monthly,
+                'growth_type': 'negative' if monthly.startswith('-') else 'positive',
+                'overall': format_growth(counts['this_year'], counts['previous_year']),
+                'monthly': monthly,
+                'day': format_growth(counts['today'], counts['yesterday'])
+            })
+        
+        growth_metrics = pd.DataFrame(rows)
         
         print("Growth metrics loaded successfully")
         return True
@@ -63,6 +384,21 @@ def load_growth_metrics():
         print(f"Error loading growth metrics: {e}")
         return False
 
+def refresh_kpis():
+    """Recompute dashboard stats and growth metrics if the patient data or the day changed"""
+    global kpi_version
+    
+    with data_lock:
+        # The admission windows are relative to today, so unchanged data still
+        # needs recomputing once the date rolls over
+        key = (data_version, pd.Timestamp.today().normalize())
+        if kpi_version == key and dashboard_stats is not None and growth_metrics is not None:
+            return
+        
+        load_dashboard_stats(key[1])
+        load_growth_metrics(key[1])
+        kpi_version = key
+
 class ChartDataProvider:
     """Class to provide all chart data configurations"""
     
@@ -353,51 +689,307 @@ class ChartDataProvider:
             }
         }
 
-def load_csv_data():
-    """Load patient data from Google Sheets CSV URL with timeout and fallback"""
-    global patients_df
+class CircuitBreaker:
+    """Stop calling a failing upstream, retrying with exponential backoff.
+
+    After failure_threshold consecutive failures the circuit opens and
+    allow_request() returns False until the backoff expires; then a single
+    trial request is let through (half-open) and its outcome closes the
+    circuit or reopens it with a doubled backoff.
+    """
+    
+    def __init__(self, failure_threshold=3, base_backoff=30, max_backoff=600):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.open_until = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+    
+    def is_open(self):
+        return self.open_until is not None and datetime.now() < self.open_until
+    
+    def allow_request(self):
+        with self.lock:
+            if self.open_until is None:
+                return True
+            if datetime.now() < self.open_until or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+    
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.open_until = None
+            self.trial_in_flight = False
+    
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.failures >= self.failure_threshold:
+                backoff = min(self.base_backoff * 2 ** (self.failures - self.failure_threshold), self.max_backoff)
+                self.open_until = datetime.now() + timedelta(seconds=backoff)
+                print(f"Google Sheets circuit open for {backoff} seconds after {self.failures} failures")
+    
+    def reset(self):
+        self.record_success()
+    
+    def describe(self):
+        return {
+            'state': 'open' if self.is_open() else ('half-open' if self.open_until else 'closed'),
+            'failures': self.failures,
+            'retry_at': self.open_until.isoformat() if self.open_until else None
+        }
+
+sheet_breaker = CircuitBreaker()
+
+# Last good sheet payload, and where the current patients_df came from
+sheet_cache = {'text': None, 'etag': None, 'fetched_at': None}
+data_source = {'source': None, 'fetched_at': None, 'error': None}
+
+# data_version right after the last sheet load; differs once patients are edited locally
+sheet_loaded_version = None
+
+revalidation_thread = None
+revalidation_lock = threading.Lock()
+
+class SheetUnavailable(Exception):
+    """Raised when the sheet is not fetched because the circuit is open"""
+
+def sheet_request_headers():
+    """Conditional request headers for the sheet fetch"""
+    return {'If-None-Match': sheet_cache['etag']} if sheet_cache['etag'] else {}
+
+def record_sheet_response(status_code, text, etag):
+    """Record a successful sheet response; returns (text, changed)"""
+    sheet_breaker.record_success()
+    sheet_cache['fetched_at'] = datetime.now()
+    
+    if status_code == 304 or text == sheet_cache['text']:
+        return sheet_cache['text'], False
+    
+    sheet_cache['text'] = text
+    sheet_cache['etag'] = etag
+    try:
+        save_sheet_payload(text)
+    except OSError as e:
+        print(f"Could not save sheet payload: {e}")
+    return text, True
+
+def save_sheet_payload(text):
+    """Replace the last good payload atomically so a crash never leaves it truncated"""
+    ensure_private_dir(SHEET_CACHE_DIR)
+    fd, tmp_path = tempfile.mkstemp(dir=SHEET_CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, sheet_cache_path())
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def fetch_sheet_payload():
+    """Fetch the sheet CSV through the circuit breaker; returns (text, changed)"""
+    if not sheet_breaker.allow_request():
+        raise SheetUnavailable('Google Sheets circuit is open')
     
     try:
-        print("Loading data from Google Sheets...")
-        
         # Make HTTP request with shorter timeout
-        response = requests.get(GOOGLE_SHEETS_CSV_URL, timeout=5)
-        response.raise_for_status()
-        
-        # Parse CSV data
-        csv_data = StringIO(response.text)
-        patients_df = pd.read_csv(csv_data)
-        
-        # Validate data
-        if patients_df.empty:
-            print("Google Sheets returned empty data. Using sample data.")
-            patients_df = create_sample_data()
-        else:
-            print(f"Successfully loaded {len(patients_df)} patients from Google Sheets")
-            
-            # Validate required columns
-            required_columns = ['name', 'doctor', 'admitDate', 'disease', 'roomNo']
-            missing_columns = [col for col in required_columns if col not in patients_df.columns]
-            
-            if missing_columns:
-                print(f"Warning: Missing columns in Google Sheets: {missing_columns}")
-                patients_df = create_sample_data()
-                print("Using sample data due to missing columns")
-        
-    except requests.exceptions.Timeout:
-        print("Google Sheets request timed out. Using sample data.")
-        patients_df = create_sample_data()
-    except requests.exceptions.RequestException as e:
-        print(f"Error loading from Google Sheets: {e}")
-        print("Falling back to sample data...")
-        patients_df = create_sample_data()
-    except pd.errors.EmptyDataError:
-        print("Google Sheets returned empty data. Using sample data.")
-        patients_df = create_sample_data()
-    except Exception as e:
-        print(f"Unexpected error loading CSV: {e}")
-        print(f"Traceback: {traceback.format_exc()}")
-        patients_df = create_sample_data()
+        response = requests.get(GOOGLE_SHEETS_CSV_URL, timeout=5, headers=sheet_request_headers())
+        if response.status_code != 304:
+            response.raise_for_status()
+    except requests.exceptions.RequestException:
+        sheet_breaker.record_failure()
+        raise
+    
+    return record_sheet_response(response.status_code, response.text, response.headers.get('ETag'))
+
+def parse_sheet_payload(text):
+    """Parse and prepare sheet CSV text; raises ValueError if it is unusable"""
+    df = pd.read_csv(StringIO(text))
+    if df.empty:
+        raise ValueError('Google Sheets returned empty data')
+    
+    # Validate required columns
+    required_columns = ['name', 'doctor', 'admitDate', 'disease', 'roomNo']
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f'Missing columns in Google Sheets: {missing_columns}')
+    
+    return prepare_patients(df)
+
+def sheet_cache_path():
+    """Saved payload file for the current sheet URL"""
+    url_hash = hashlib.sha1(GOOGLE_SHEETS_CSV_URL.encode()).hexdigest()[:16]
+    return os.path.join(SHEET_CACHE_DIR, f'sheet_{url_hash}.csv')
+
+def load_saved_sheet_payload():
+    """Read the sheet payload saved by a previous run, if any"""
+    path = sheet_cache_path()
+    if sheet_cache['text'] is None and os.path.exists(path):
+        try:
+            # Served as real data, so only trust a file in a directory we own
+            ensure_private_dir(SHEET_CACHE_DIR)
+        except OSError as e:
+            print(f"Not reading the saved sheet payload: {e}")
+            return None
+        with open(path) as f:
+            sheet_cache['text'] = f.read()
+        sheet_cache['fetched_at'] = datetime.fromtimestamp(os.path.getmtime(path))
+    return sheet_cache['text']
+
+def apply_sheet_payload(text, changed, background=False):
+    """Replace patients_df with a freshly fetched sheet payload.
+
+    Unchanged payloads never replace existing data, and background
+    revalidation never replaces data that was edited locally, even if the
+    edit lands while the payload is being parsed.
+    """
+    global last_validation_report
+    
+    if not changed and patients_df is not None:
+        print("Google Sheets data unchanged")
+        if sheet_loaded_version == data_version:
+            data_source.update(source='google_sheets', fetched_at=sheet_cache['fetched_at'], error=None)
+        return
+    if background and sheet_loaded_version != data_version:
+        print("Keeping local changes; not applying revalidated Google Sheets data")
+        return
+    
+    df, report = parse_sheet_payload(text)
+    if replace_patients(df, 'google_sheets', sheet_cache['fetched_at'], keep_local_edits=background) is None:
+        print("Keeping local changes; not applying revalidated Google Sheets data")
+        return
+    last_validation_report = report
+    data_source['error'] = None
+    print(f"Successfully loaded {len(patients_df)} patients from Google Sheets")
+
+def describe_sheet_error(e):
+    """Turn a sheet loading exception into the message reported to clients"""
+    if isinstance(e, SheetUnavailable):
+        return str(e)
+    if isinstance(e, requests.exceptions.Timeout):
+        return 'Google Sheets request timed out'
+    if isinstance(e, requests.exceptions.RequestException):
+        return f'Error loading from Google Sheets: {e}'
+    if isinstance(e, (ValueError, pd.errors.ParserError)):
+        return str(e)
+    print(f"Traceback: {traceback.format_exc()}")
+    return f'Unexpected error loading CSV: {e}'
+
+def recover_from_sheet_failure(error):
+    """Keep serving current or last good data after a failed sheet load"""
+    global last_validation_report
+    
+    print(error)
+    data_source['error'] = error
+    
+    # Keep serving what we have rather than replacing it with sample data
+    if patients_df is not None:
+        print("Keeping current data")
+        if data_source['source'] == 'google_sheets':
+            data_source['source'] = 'stale_cache'
+        return
+    
+    text = load_saved_sheet_payload()
+    if text is not None:
+        try:
+            df, report = parse_sheet_payload(text)
+            last_validation_report = report
+            replace_patients(df, 'stale_cache', sheet_cache['fetched_at'])
+            print(f"Serving {len(patients_df)} patients from the last good Google Sheets payload")
+            return
+        except Exception as e:
+            print(f"Saved Google Sheets payload is unusable: {e}")
+    
+    print("Falling back to sample data...")
+    replace_patients(create_sample_data(), 'sample')
+
+def load_csv_data(background=False):
+    """Load patient data from Google Sheets, serving the last good payload when it is unavailable"""
+    try:
+        print("Loading data from Google Sheets...")
+        text, changed = fetch_sheet_payload()
+        apply_sheet_payload(text, changed, background)
+    except Exception as e:
+        recover_from_sheet_failure(describe_sheet_error(e))
+
+def get_data_freshness():
+    """Describe where the patient data came from and how old it is"""
+    fetched_at = data_source['fetched_at']
+    age = (datetime.now() - fetched_at).total_seconds() if fetched_at else None
+    return {
+        'source': data_source['source'],
+        'fetched_at': fetched_at.isoformat() if fetched_at else None,
+        'age_seconds': round(age) if age is not None else None,
+        'stale': data_source['source'] != 'google_sheets' or age is None or age > SHEET_MAX_AGE,
+        'local_changes': sheet_loaded_version != data_version,
+        'revalidating': revalidation_thread is not None and revalidation_thread.is_alive(),
+        'last_error': data_source['error'],
+        'circuit': sheet_breaker.describe()
+    }
+
+def revalidate_if_stale():
+    """Load data on first use; afterwards refetch stale sheet data in the background"""
+    global revalidation_thread
+    
+    if patients_df is None:
+        if not restore_patients_from_journal():
+            load_csv_data()
+        return
+    
+    # Never let a background refetch overwrite uploads or local edits
+    if sheet_loaded_version != data_version or sheet_breaker.is_open():
+        return
+    
+    fetched_at = data_source['fetched_at']
+    if fetched_at is not None and (datetime.now() - fetched_at).total_seconds() <= SHEET_MAX_AGE:
+        return
+    
+    with revalidation_lock:
+        if revalidation_thread is not None and revalidation_thread.is_alive():
+            return
+        revalidation_thread = threading.Thread(target=load_csv_data, args=(True,), daemon=True)
+        revalidation_thread.start()
+
+def prepare_patients(df):
+    """Validate freshly ingested patients, dropping invalid rows and applying the duplicate policy.
+
+    Invalid optional values (gender, phone, ...) are cleared rather than
+    costing the whole row. Raises ValueError if no valid row is left, so a
+    broken sheet never replaces the current data.
+    """
+    df, invalid, report = validate_patients(df, clear_optional=True)
+    if report['cleared_values']:
+        print(f"Warning: Cleared {report['cleared_values']} invalid optional values")
+    if invalid.any():
+        print(f"Warning: Dropping {report['invalid_rows']} invalid rows")
+        df = df[~invalid].reset_index(drop=True)
+    if df.empty:
+        raise ValueError(f"No valid patients left after validation ({report['invalid_rows']} invalid rows)")
+    df, _ = apply_duplicate_policy(df, DUPLICATE_POLICY)
+    return df, report
+
+def fetch_patients_csv(url):
+    """Fetch and prepare a patients CSV without falling back to sample data"""
+    response = requests.get(url, timeout=5)
+    response.raise_for_status()
+    
+    df = pd.read_csv(StringIO(response.text))
+    
+    required_columns = ['name', 'doctor', 'admitDate', 'disease', 'roomNo']
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f'Missing columns: {missing_columns}')
+    
+    df, _ = prepare_patients(df)
+    return df
 
 def create_sample_data():
     """Create sample patient data"""
@@ -495,27 +1087,29 @@ def create_sample_data():
     print(f"Created sample data with {len(sample_data)} patients")
     return pd.DataFrame(sample_data)
 
-def get_disease_stats():
+def get_disease_stats(df=None):
     """Get disease statistics for charts"""
-    if patients_df is None:
+    df = patients_df if df is None else df
+    if df is None:
         return {}
     
     try:
-        disease_counts = patients_df['disease'].value_counts().to_dict()
+        disease_counts = df['disease'].value_counts().to_dict()
         return disease_counts
     except Exception as e:
         print(f"Error getting disease stats: {e}")
         return {}
 
-def get_monthly_stats():
+def get_monthly_stats(df=None):
     """Get monthly statistics for charts"""
-    if patients_df is None:
+    df = patients_df if df is None else df
+    if df is None:
         return {}
     
     try:
         # Group by month
-        patients_df['month'] = pd.to_datetime(patients_df['admitDate']).dt.to_period('M')
-        monthly_counts = patients_df.groupby('month').size().to_dict()
+        months = pd.to_datetime(df['admitDate'], errors='coerce').dt.to_period('M')
+        monthly_counts = months.value_counts().sort_index().to_dict()
         
         # Convert period to string for JSON serialization
         monthly_stats = {str(k): v for k, v in monthly_counts.items()}
@@ -525,28 +1119,764 @@ def get_monthly_stats():
         print(f"Error getting monthly stats: {e}")
         return {}
 
-def get_doctor_stats():
+def get_doctor_stats(df=None):
     """Get doctor statistics"""
-    if patients_df is None:
+    df = patients_df if df is None else df
+    if df is None:
         return {}
     
     try:
-        doctor_counts = patients_df['doctor'].value_counts().to_dict()
+        doctor_counts = df['doctor'].value_counts().to_dict()
         return doctor_counts
     except Exception as e:
         print(f"Error getting doctor stats: {e}")
         return {}
 
+# Cohort analytics
+
+# Lower edges of the default age bands and length-of-stay buckets (days)
+AGE_BAND_EDGES = [0, 18, 30, 45, 60, 75]
+STAY_BUCKET_EDGES = [0, 1, 3, 7, 14, 30]
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+def band_labels(edges):
+    """Labels such as '18-29' for consecutive integer edges, with an open last band"""
+    labels = [f'{low}-{high - 1}' if high - low > 1 else str(low) for low, high in zip(edges, edges[1:])]
+    return labels + [f'{edges[-1]}+']
+
+def count_bands(values, edges):
+    """Count values per band, in band order; values below the first edge are dropped"""
+    values = values[~np.isnan(values)]
+    positions = np.searchsorted(np.asarray(edges, dtype=float), values, side='right') - 1
+    counts = np.bincount(positions[positions >= 0], minlength=len(edges))
+    return counts.tolist()
+
+def get_analytics_cohort():
+    """Parsed numeric and date columns of patients_df, rebuilt when the data changes"""
+    global analytics_cohort, analytics_cohort_version
+    
+    with data_lock:
+        if analytics_cohort_version == data_version and analytics_cohort is not None:
+            return analytics_cohort
+        
+        df = patients_df
+        empty = pd.Series(np.nan, index=df.index)
+        
+        def text_column(column):
+            if column not in df.columns:
+                return pd.Series('Unknown', index=df.index)
+            values = df[column].astype(str).str.strip()
+            return values.where(df[column].notna() & (values != ''), 'Unknown')
+        
+        def date_column(column):
+            if column not in df.columns:
+                return pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+            return pd.to_datetime(df[column], errors='coerce', format='ISO8601').dt.normalize()
+        
+        analytics_cohort = pd.DataFrame({
+            'age': pd.to_numeric(df['age'], errors='coerce').astype(float) if 'age' in df.columns else empty,
+            'gender': text_column('gender'),
+            'disease': text_column('disease'),
+            'admitDate': date_column('admitDate'),
+            'dischargeDate': date_column('dischargeDate')
+        })
+        analytics_cohort_version = data_version
+        return analytics_cohort
+
+def get_age_band_analytics(cohort, args):
+    """Patients per age band, overall and per gender"""
+    edges = AGE_BAND_EDGES
+    if args.get('age_bands'):
+        try:
+            edges = sorted({int(edge) for edge in args['age_bands'].split(',')})
+        except ValueError:
+            raise ValueError('age_bands must be comma-separated integers')
+    
+    ages = cohort['age'].to_numpy()
+    by_gender = {
+        gender: count_bands(ages[(cohort['gender'] == gender).to_numpy()], edges)
+        for gender in sorted(cohort['gender'].unique())
+    }
+    return {
+        'bands': band_labels(edges),
+        'counts': count_bands(ages, edges),
+        'by_gender': by_gender,
+        'unknown_age': int(np.isnan(ages).sum())
+    }
+
+def get_gender_disease_analytics(cohort, args):
+    """Cross-tab of gender by disease"""
+    gender_codes, genders = pd.factorize(cohort['gender'], sort=True)
+    disease_codes, diseases = pd.factorize(cohort['disease'], sort=True)
+    counts = np.bincount(gender_codes * len(diseases) + disease_codes, minlength=len(genders) * len(diseases))
+    matrix = counts.reshape(len(genders), len(diseases))
+    return {
+        'genders': genders.tolist(),
+        'diseases': diseases.tolist(),
+        'counts': matrix.tolist(),
+        'gender_totals': dict(zip(genders.tolist(), matrix.sum(axis=1).tolist())),
+        'disease_totals': dict(zip(diseases.tolist(), matrix.sum(axis=0).tolist()))
+    }
+
+def get_weekday_analytics(cohort, args):
+    """Admissions per day of the week"""
+    admit_dates = cohort['admitDate'].dropna()
+    counts = np.bincount(admit_dates.dt.weekday.to_numpy(), minlength=7)
+    return {
+        'weekdays': WEEKDAYS,
+        'counts': counts.tolist(),
+        'unknown_date': int(cohort['admitDate'].isna().sum())
+    }
+
+def get_length_of_stay_analytics(cohort, args):
+    """Length-of-stay distribution for discharged patients"""
+    admitted = cohort['admitDate'].notna()
+    discharged = admitted & cohort['dischargeDate'].notna()
+    stays = (cohort['dischargeDate'][discharged] - cohort['admitDate'][discharged]).dt.days.to_numpy(dtype=float)
+    valid = stays[stays >= 0]
+    
+    by_disease = {}
+    if len(valid):
+        per_disease = pd.Series(stays, index=cohort['disease'][discharged].to_numpy())
+        per_disease = per_disease[per_disease >= 0].groupby(level=0)
+        by_disease = {
+            disease: {'patients': int(row['count']), 'mean_days': round(float(row['mean']), 1), 'median_days': float(row['median'])}
+            for disease, row in per_disease.agg(['count', 'mean', 'median']).iterrows()
+        }
+    
+    return {
+        'discharged': int(len(valid)),
+        'still_admitted': int((admitted & cohort['dischargeDate'].isna()).sum()),
+        'invalid': int((stays < 0).sum()),
+        'buckets': band_labels(STAY_BUCKET_EDGES),
+        'counts': count_bands(valid, STAY_BUCKET_EDGES),
+        'mean_days': round(float(valid.mean()), 1) if len(valid) else None,
+        'median_days': float(np.median(valid)) if len(valid) else None,
+        'p90_days': float(np.percentile(valid, 90)) if len(valid) else None,
+        'by_disease': by_disease
+    }
+
+# Views served under /api/analytics/<view>
+ANALYTICS_VIEWS = {
+    'age-bands': get_age_band_analytics,
+    'gender-disease': get_gender_disease_analytics,
+    'weekday-admissions': get_weekday_analytics,
+    'length-of-stay': get_length_of_stay_analytics
+}
+
+def select_cohort(args):
+    """Apply column filters and an admitted_from/admitted_to range to the analytics cohort"""
+    cohort = get_analytics_cohort()
+    mask = pd.Series(True, index=cohort.index)
+    
+    filters = {column: args.getlist(column) for column in args if column in patients_df.columns}
+    if filters:
+        mask &= build_patient_mask(patients_df, filters=filters)
+    
+    for arg, compare in (('admitted_from', cohort['admitDate'].ge), ('admitted_to', cohort['admitDate'].le)):
+        if args.get(arg):
+            bound = pd.to_datetime(args[arg], errors='coerce')
+            if pd.isna(bound):
+                raise ValueError(f'{arg} must be a date')
+            mask &= compare(bound.normalize())
+    
+    return cohort if mask.all() else cohort[mask.to_numpy()]
+
+def get_analytics(views, args):
+    """Compute analytics views for the filtered cohort, memoized per data version and query"""
+    # Views are keyed on the arguments that shape their result, order-insensitively
+    query = tuple(sorted((arg, tuple(args.getlist(arg))) for arg in args))
+    results = {}
+    
+    with data_lock:
+        cohort = None
+        for view in views:
+            key = (data_version, view, query)
+            if key in analytics_cache:
+                analytics_cache.move_to_end(key)
+                results[view] = analytics_cache[key]
+                continue
+            
+            if cohort is None:
+                cohort = select_cohort(args)
+            results[view] = ANALYTICS_VIEWS[view](cohort, args)
+            results[view]['patients'] = len(cohort)
+            
+            analytics_cache[key] = results[view]
+            while len(analytics_cache) > ANALYTICS_CACHE_SIZE:
+                analytics_cache.popitem(last=False)
+    
+    return results
+
+def normalize_room_numbers(rooms):
+    """Normalize a roomNo series to comparable strings; blank rooms become NaN"""
+    normalized = rooms.astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    return normalized.mask(rooms.isna() | normalized.isin(['', 'nan', 'None']))
+
+def get_occupying_mask(df):
+    """Rows that currently hold a bed (not yet discharged)"""
+    if 'dischargeDate' in df.columns:
+        return df['dischargeDate'].isna() | (df['dischargeDate'].astype(str).str.strip() == '')
+    return pd.Series(True, index=df.index)
+
+def get_room_index():
+    """Get the room -> occupant positions index, rebuilding it if the data changed"""
+    global room_index, room_index_version
+    
+    with data_lock:
+        if room_index_version == data_version:
+            return room_index
+        
+        room_index = {}
+        if patients_df is not None and 'roomNo' in patients_df.columns:
+            rooms = normalize_room_numbers(patients_df['roomNo'])
+            rooms = rooms[get_occupying_mask(patients_df) & rooms.notna()]
+            positions = pd.Series(range(len(patients_df)), index=patients_df.index)[rooms.index]
+            room_index = {room: group.tolist() for room, group in positions.groupby(rooms.to_numpy())}
+        
+        room_index_version = data_version
+        return room_index
+
+def remove_room_positions(positions, size, renumber=False):
+    """Drop rows from the room index, renumbering later rows if they were deleted"""
+    removed = np.zeros(size, dtype=bool)
+    removed[positions] = True
+    shift = np.cumsum(removed) if renumber else None
+    
+    for room in list(room_index):
+        occupants = np.asarray(room_index[room])
+        occupants = occupants[~removed[occupants]]
+        if not len(occupants):
+            del room_index[room]
+            continue
+        room_index[room] = (occupants - shift[occupants] if renumber else occupants).tolist()
+
+def add_room_positions(positions):
+    """Index the given rows under their room if they currently hold a bed"""
+    if 'roomNo' not in patients_df.columns:
+        return
+    rows = patients_df.iloc[positions]
+    rooms = normalize_room_numbers(rows['roomNo'])
+    rooms = rooms[get_occupying_mask(rows) & rooms.notna()]
+    positions = pd.Series(positions, index=rows.index)[rooms.index]
+    for room, group in positions.groupby(rooms.to_numpy()):
+        room_index[room] = sorted(room_index.get(room, []) + group.tolist())
+
+def index_room_mutation(record, previous_version, mask=None):
+    """Apply a mutation to the room index in place instead of rebuilding it.
+
+    Call with data_lock held, after apply_mutation and mark_data_changed;
+    mask is the row mask a bulk mutation matched.
+    """
+    global room_index_version
+    
+    if room_index_version != previous_version:
+        return
+    
+    op = record['op']
+    if op == 'add':
+        changed = [len(patients_df) - 1]
+    elif op in ('update', 'delete'):
+        changed = [record['id']]
+    else:
+        changed = np.flatnonzero(mask)
+    
+    if op in ('delete', 'bulk_delete'):
+        remove_room_positions(changed, len(patients_df) + len(changed), renumber=True)
+    elif op == 'add' or any(field in record['changes'] for field in ('roomNo', 'dischargeDate')):
+        if op != 'add':
+            remove_room_positions(changed, len(patients_df))
+        add_room_positions(changed)
+    room_index_version = data_version
+
+def get_room_floor(room):
+    """Derive the floor from a room number (room 105 is on floor 1)"""
+    return str(int(room) // 100) if room.isdigit() else room[:1].upper()
+
+def get_room_occupancy():
+    """Get per-room and per-floor occupancy counts"""
+    rooms = {}
+    floors = {}
+    for room, positions in sorted(get_room_index().items()):
+        occupants = len(positions)
+        rooms[room] = {
+            'occupants': occupants,
+            'capacity': ROOM_CAPACITY,
+            'free_beds': max(ROOM_CAPACITY - occupants, 0),
+            'overbooked': occupants > ROOM_CAPACITY,
+            'patient_ids': positions
+        }
+        
+        floor = floors.setdefault(get_room_floor(room), {'rooms': 0, 'occupants': 0, 'free_beds': 0})
+        floor['rooms'] += 1
+        floor['occupants'] += occupants
+        floor['free_beds'] += rooms[room]['free_beds']
+    
+    return {
+        'rooms': rooms,
+        'floors': floors,
+        'total_occupants': sum(room['occupants'] for room in rooms.values()),
+        'total_free_beds': sum(room['free_beds'] for room in rooms.values()),
+        'overbooked_rooms': [room for room, info in rooms.items() if info['overbooked']]
+    }
+
+def build_identity_keys(df, fields=None):
+    """Hash the normalized identity fields of every row in one vectorized pass"""
+    fields = fields or DUPLICATE_KEY_FIELDS
+    normalized = pd.DataFrame(index=df.index)
+    
+    for field in fields:
+        if field not in df.columns:
+            normalized[field] = ''
+            continue
+        values = df[field].astype(str).mask(df[field].isna(), '')
+        if field == 'phone':
+            # Compare phone numbers on their digits only
+            values = values.str.replace(r'\.0$', '', regex=True).str.replace(r'\D', '', regex=True)
+        else:
+            values = values.str.lower().str.split().str.join(' ')
+        normalized[field] = values
+    
+    return pd.util.hash_pandas_object(normalized, index=False)
+
+def get_identity_keys():
+    """Get the identity hash of every row, rehashing only if the data was replaced"""
+    global identity_keys, identity_keys_version, identity_counts
+    
+    with data_lock:
+        if identity_keys_version == data_version:
+            return identity_keys
+        
+        if patients_df is not None and not patients_df.empty:
+            identity_keys = build_identity_keys(patients_df).to_numpy()
+        else:
+            identity_keys = np.empty(0, dtype=np.uint64)
+        identity_counts = {}
+        count_identities(identity_keys, 1)
+        
+        identity_keys_version = data_version
+        return identity_keys
+
+def count_identities(keys, delta):
+    """Add delta to identity_counts for every hash in keys"""
+    for key, count in zip(*(values.tolist() for values in np.unique(keys, return_counts=True))):
+        count = identity_counts.get(key, 0) + delta * count
+        if count > 0:
+            identity_counts[key] = count
+        else:
+            identity_counts.pop(key, None)
+
+def find_identity_matches(identity):
+    """Positions of the patients sharing a normalized identity hash.
+
+    The common case, a new identity, is answered from identity_counts; only a
+    real match scans the hashes for its positions.
+    """
+    with data_lock:
+        keys = get_identity_keys()
+        if not identity_counts.get(identity):
+            return []
+        return np.flatnonzero(keys == np.uint64(identity)).tolist()
+
+def index_identity_mutation(record, previous_version, mask=None):
+    """Apply a mutation to identity_keys in place instead of rehashing every row.
+
+    Call with data_lock held, after apply_mutation and mark_data_changed;
+    mask is the row mask a bulk mutation matched.
+    """
+    global identity_keys, identity_keys_version
+    
+    if identity_keys_version != previous_version:
+        return
+    
+    op = record['op']
+    identity_changed = any(field in record.get('changes', {}) for field in DUPLICATE_KEY_FIELDS)
+    if op == 'add':
+        added = build_identity_keys(patients_df.iloc[-1:]).to_numpy()
+        identity_keys = np.append(identity_keys, added)
+        count_identities(added, 1)
+    elif op == 'update' and identity_changed:
+        count_identities(identity_keys[[record['id']]], -1)
+        identity_keys[record['id']] = build_identity_keys(patients_df.iloc[[record['id']]]).iloc[0]
+        count_identities(identity_keys[[record['id']]], 1)
+    elif op == 'delete':
+        count_identities(identity_keys[[record['id']]], -1)
+        identity_keys = np.delete(identity_keys, record['id'])
+    elif op == 'bulk_update' and identity_changed:
+        count_identities(identity_keys[mask], -1)
+        identity_keys[mask] = build_identity_keys(patients_df[mask]).to_numpy()
+        count_identities(identity_keys[mask], 1)
+    elif op == 'bulk_delete':
+        count_identities(identity_keys[mask], -1)
+        identity_keys = identity_keys[~mask]
+    identity_keys_version = data_version
+
+def find_duplicate_groups(df, fields=None):
+    """Group row positions that share the same normalized identity"""
+    if df is None or df.empty:
+        return []
+    
+    fields = fields or DUPLICATE_KEY_FIELDS
+    if df is patients_df and list(fields) == list(DUPLICATE_KEY_FIELDS):
+        # The write routes keep the cached hashes current
+        keys = pd.Series(get_identity_keys())
+    else:
+        keys = build_identity_keys(df, fields)
+    repeated = keys.duplicated(keep=False).to_numpy()
+    if not repeated.any():
+        return []
+    
+    positions = pd.Series(range(len(df)))[repeated]
+    groups = []
+    for _, group in positions.groupby(keys.to_numpy()[repeated]):
+        first = df.iloc[group.iloc[0]]
+        groups.append({
+            'key': {field: (None if field not in df.columns or pd.isna(first[field]) else str(first[field])) for field in fields},
+            'patient_ids': group.tolist(),
+            'count': len(group)
+        })
+    return groups
+
+def apply_duplicate_policy(df, policy):
+    """Flag or merge duplicate identities in freshly ingested data.
+
+    'merge' keeps the last record per identity; 'flag' only reports them.
+    Returns the resulting dataframe and the number of duplicate rows found.
+    """
+    duplicated = build_identity_keys(df).duplicated(keep='last')
+    duplicate_count = int(duplicated.sum())
+    
+    if duplicate_count:
+        if policy == 'merge':
+            print(f"Merging {duplicate_count} duplicate patient records")
+            df = df[~duplicated.to_numpy()].reset_index(drop=True)
+        else:
+            print(f"Warning: {duplicate_count} duplicate patient records found")
+    
+    return df, duplicate_count
+
+# Declarative patient schema enforced at ingest and on every write
+PATIENT_SCHEMA = {
+    'name': {'type': 'string', 'required': True},
+    'doctor': {'type': 'string', 'required': True},
+    'admitDate': {'type': 'date', 'required': True},
+    'disease': {'type': 'string', 'required': True},
+    'roomNo': {'type': 'string', 'required': True, 'nullable': True},
+    'age': {'type': 'integer', 'min': 0, 'max': 130},
+    'gender': {'type': 'category', 'allowed': ['Male', 'Female', 'Other']},
+    'phone': {'type': 'string', 'pattern': r'^\+?\d{7,15}$'},
+    'address': {'type': 'string'},
+    'dischargeDate': {'type': 'date'}
+}
+
+# Maximum number of individual row errors included in a validation report
+MAX_REPORTED_ERRORS = 100
+
+# Report from the most recent ingest, exposed at /api/validation-report
+last_validation_report = None
+
+def validate_values(values, rule):
+    """Validate and coerce a series of values; returns the coerced values and an error message per value"""
+    present = values.notna() & (values.astype(str).str.strip() != '')
+    errors = pd.Series(None, index=values.index, dtype=object)
+    coerced = values
+    
+    if rule['type'] == 'string':
+        coerced = values.astype(str).str.strip().where(present)
+        if 'pattern' in rule:
+            # Strip common phone punctuation before matching
+            compact = coerced.str.replace(r'\.0$', '', regex=True).str.replace(r'[\s\-()]', '', regex=True)
+            errors[present & ~compact.str.match(rule['pattern']).fillna(False).astype(bool)] = 'has an invalid format'
+            coerced = compact
+    elif rule['type'] == 'date':
+        # Parse ISO dates in one fast pass; only the leftovers go through the slow mixed parser
+        parsed = pd.to_datetime(values.where(present), errors='coerce', format='ISO8601')
+        leftovers = present & parsed.isna()
+        if leftovers.any():
+            parsed[leftovers] = pd.to_datetime(values[leftovers], errors='coerce', format='mixed')
+        errors[present & parsed.isna()] = 'is not a valid date'
+        coerced = parsed.dt.strftime('%Y-%m-%d')
+    elif rule['type'] == 'integer':
+        numbers = pd.to_numeric(values.where(present), errors='coerce')
+        # Whole numbers beyond float precision cannot be told apart, so they are out of range too
+        finite = numbers.notna() & (numbers.abs() < 2 ** 53)
+        errors[present & numbers.isna()] = 'is not a number'
+        errors[numbers.notna() & ~finite] = 'is out of range'
+        errors[finite & (numbers % 1 != 0)] = 'is not a whole number'
+        if 'min' in rule:
+            errors[finite & (numbers < rule['min'])] = f"is below {rule['min']}"
+        if 'max' in rule:
+            errors[finite & (numbers > rule['max'])] = f"is above {rule['max']}"
+        # Cast only the values that passed, so infinities and huge values cannot break it
+        coerced = numbers.where(errors.isna()).round().astype('Int64')
+    elif rule['type'] == 'category':
+        lookup = {option.lower(): option for option in rule['allowed']}
+        coerced = values.astype(str).str.strip().str.lower().map(lookup)
+        errors[present & coerced.isna()] = f"must be one of {rule['allowed']}"
+    
+    if rule.get('required') and not rule.get('nullable'):
+        errors[~present] = 'is required'
+    
+    return coerced, errors
+
+def validate_column(values, rule):
+    """Validate one column, checking each distinct value once and broadcasting back to the rows"""
+    codes, uniques = pd.factorize(values)
+    
+    # Missing values share a trailing slot so they are validated once as well
+    distinct = pd.concat([pd.Series(uniques, dtype=object), pd.Series([None], dtype=object)], ignore_index=True)
+    codes[codes == -1] = len(uniques)
+    
+    coerced, errors = validate_values(distinct, rule)
+    coerced = coerced.take(codes)
+    errors = errors.take(codes)
+    coerced.index = values.index
+    errors.index = values.index
+    return coerced, errors
+
+def validate_patients(df, partial=False, clear_optional=False):
+    """Validate and coerce patient rows against PATIENT_SCHEMA with whole-column checks.
+
+    With partial=True only the columns present in df are checked, which is how
+    updates are validated. With clear_optional=True an invalid value in an
+    optional column is reported and set to null instead of invalidating its
+    row. Returns the coerced dataframe, a boolean mask of invalid rows and a
+    compact report.
+    """
+    coerced_df = df.copy()
+    invalid = pd.Series(False, index=df.index)
+    report = {'rows': len(df), 'errors_by_column': {}, 'errors': [], 'cleared_values': 0}
+    
+    for column, rule in PATIENT_SCHEMA.items():
+        if column not in df.columns:
+            if rule.get('required') and not partial:
+                report['errors_by_column'][column] = len(df)
+                report['errors'].append({'row': None, 'column': column, 'error': 'column is missing'})
+                invalid[:] = True
+            continue
+        
+        coerced, errors = validate_column(df[column], rule)
+        coerced_df[column] = coerced
+        
+        bad = errors.notna()
+        if bad.any():
+            if clear_optional and not rule.get('required'):
+                coerced_df[column] = coerced.where(~bad, None)
+                report['cleared_values'] += int(bad.sum())
+            else:
+                invalid |= bad
+            report['errors_by_column'][column] = int(bad.sum())
+            room = MAX_REPORTED_ERRORS - len(report['errors'])
+            for position in pd.Series(range(len(df)))[bad.to_numpy()].head(max(room, 0)):
+                report['errors'].append({
+                    'row': int(position),
+                    'column': column,
+                    'value': str(df[column].iloc[position]),
+                    'error': f'{column} {errors.iloc[position]}'
+                })
+    
+    report['invalid_rows'] = int(invalid.sum())
+    report['valid_rows'] = len(df) - report['invalid_rows']
+    return coerced_df, invalid, report
+
+def find_unknown_fields(fields, df=None):
+    """Fields that are neither in the schema nor already a column of the dataset"""
+    df = patients_df if df is None else df
+    known = set(PATIENT_SCHEMA) | (set(df.columns) if df is not None else set())
+    return [field for field in fields if field not in known]
+
+class DatasetCache:
+    """LRU cache of named patient datasets kept within a memory budget.
+
+    Datasets pushed out of memory are spilled to DATASET_SPILL_DIR as Parquet
+    files and read back on the next access; datasets never loaded are fetched from
+    their registered source URL.
+    
+    self.lock only guards the bookkeeping and is never held while a dataset is
+    fetched, read back or spilled. Each dataset also has its own lock
+    (lock_for), which serializes its loading, spilling and writers; readers use
+    the frame get returns without a lock, so writers replace frames instead of
+    modifying them.
+    """
+    
+    NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+    SPILL_SUFFIX = '.parquet'
+    
+    def __init__(self, sources, budget_bytes, spill_dir):
+        self.sources = dict(sources)
+        self.budget_bytes = budget_bytes
+        self.spill_dir = spill_dir
+        self.datasets = OrderedDict()
+        self.sizes = {}
+        self.lock = threading.RLock()
+        self.dataset_locks = {}
+    
+    def validate_name(self, name):
+        if not self.NAME_PATTERN.match(name) or name == DEFAULT_DATASET:
+            raise ValueError(f'Invalid dataset name: {name}')
+        # /api/analytics/patients is the analytics view, never a dataset named analytics
+        reserved = {rule.rule.split('/')[2] for rule in app.url_map.iter_rules() if rule.rule.startswith('/api/')}
+        if name in reserved:
+            raise ValueError(f'Dataset name {name} is reserved by /api/{name}')
+    
+    def is_known(self, name):
+        with self.lock:
+            return name in self.sources or name in self.datasets or os.path.exists(self.spill_path(name))
+    
+    def spill_path(self, name):
+        return os.path.join(self.spill_dir, f'{name}{self.SPILL_SUFFIX}')
+    
+    def lock_for(self, name):
+        """The lock serializing loads of, spills of and writes to one dataset.
+
+        Raises KeyError for unknown names, so requests for arbitrary names
+        never add locks.
+        """
+        with self.lock:
+            if name not in self.dataset_locks:
+                if not self.NAME_PATTERN.match(name) or not self.is_known(name):
+                    raise KeyError(name)
+                self.dataset_locks[name] = threading.RLock()
+            return self.dataset_locks[name]
+    
+    def register(self, name, url):
+        """Register or replace the source of a named dataset, dropping any cached copy"""
+        self.validate_name(name)
+        with self.lock:
+            self.sources[name] = url
+        with self.lock_for(name), self.lock:
+            self.discard(name)
+    
+    def lookup(self, name):
+        """Get a dataset if it is in memory, marking it most recently used"""
+        with self.lock:
+            if name not in self.datasets:
+                return None
+            self.datasets.move_to_end(name)
+            return self.datasets[name]
+    
+    def get(self, name):
+        """Get a dataset, loading it from its spill file or its source on a miss"""
+        df = self.lookup(name)
+        if df is not None:
+            return df
+        
+        # Only one thread loads a given dataset; other datasets stay available
+        with self.lock_for(name):
+            df = self.lookup(name)
+            if df is not None:
+                return df
+            
+            spill_path = self.spill_path(name)
+            with self.lock:
+                spilled = os.path.exists(spill_path)
+                if name not in self.sources and not spilled:
+                    raise KeyError(name)
+                source = self.sources.get(name)
+            
+            if spilled:
+                df = read_frame(spill_path)
+            else:
+                print(f"Loading dataset {name} from its source...")
+                df = fetch_patients_csv(source)
+            
+            self.put(name, df)
+            return df
+    
+    def put(self, name, df):
+        """Store a (possibly modified) dataset as the most recently used one"""
+        with self.lock:
+            self.datasets[name] = df
+            self.datasets.move_to_end(name)
+            self.sizes[name] = int(df.memory_usage(deep=True).sum())
+        self.evict()
+    
+    def select_victims(self):
+        """Least recently used datasets to spill for the cache to fit its budget"""
+        with self.lock:
+            excess = sum(self.sizes.values()) - self.budget_bytes
+            victims = []
+            for name in list(self.datasets)[:-1]:
+                if excess <= 0:
+                    break
+                victims.append(name)
+                excess -= self.sizes.get(name, 0)
+            return victims
+    
+    def evict(self):
+        """Spill least recently used datasets until the cache fits its budget"""
+        for name in self.select_victims():
+            self.spill(name)
+    
+    def spill(self, name):
+        """Write a dataset to its spill file, then drop it from memory.
+
+        Datasets that are being loaded or written are skipped (a later put
+        spills them), so two threads never wait on each other's dataset. A
+        failed write keeps the dataset in memory.
+        """
+        dataset_lock = self.lock_for(name)
+        if not dataset_lock.acquire(blocking=False):
+            return
+        try:
+            with self.lock:
+                df = self.datasets.get(name)
+            if df is None:
+                return
+            try:
+                ensure_private_dir(self.spill_dir)
+                write_frame(df, self.spill_path(name))
+            except Exception as e:
+                print(f"Could not spill dataset {name}, keeping it in memory: {e}")
+                return
+            with self.lock:
+                if self.datasets.get(name) is df:
+                    del self.datasets[name]
+                    self.sizes.pop(name, None)
+            print(f"Evicted dataset {name} to disk")
+        finally:
+            dataset_lock.release()
+    
+    def discard(self, name):
+        """Forget the cached and spilled copies so the next access refetches the source"""
+        with self.lock:
+            self.datasets.pop(name, None)
+            self.sizes.pop(name, None)
+            if os.path.exists(self.spill_path(name)):
+                os.remove(self.spill_path(name))
+    
+    def describe(self):
+        """Summarize every known dataset for /api/datasets"""
+        with self.lock:
+            names = set(self.sources) | set(self.datasets)
+            if os.path.isdir(self.spill_dir):
+                names |= {
+                    f[:-len(self.SPILL_SUFFIX)] for f in os.listdir(self.spill_dir)
+                    if f.endswith(self.SPILL_SUFFIX) and self.NAME_PATTERN.match(f[:-len(self.SPILL_SUFFIX)])
+                }
+            return {
+                name: {
+                    'source': self.sources.get(name),
+                    'in_memory': name in self.datasets,
+                    'spilled': name not in self.datasets and os.path.exists(self.spill_path(name)),
+                    'bytes': self.sizes.get(name),
+                    'patients_count': len(self.datasets[name]) if name in self.datasets else None
+                }
+                for name in sorted(names)
+            }
+
+dataset_cache = DatasetCache(DATASET_SOURCES, DATASET_CACHE_BUDGET_MB * 1024 * 1024, DATASET_SPILL_DIR)
+
 # Initialize data function
 def initialize_data():
     """Initialize all data with error handling"""
     try:
         print("Initializing hospital dashboard data...")
         
-        # Load all data
-        load_csv_data()
-        load_dashboard_stats()
-        load_growth_metrics()
+        # Load all data, preferring journaled state on a cold start
+        if patients_df is not None or not restore_patients_from_journal():
+            load_csv_data()
+        refresh_kpis()
         
         print("Data initialization completed successfully")
         return True
@@ -555,8 +1885,128 @@ def initialize_data():
         print(f"Traceback: {traceback.format_exc()}")
         return False
 
+def warm_caches():
+    """Build the per-version derived data so the first requests don't pay for it"""
+    with data_lock:
+        if patients_df is None:
+            return
+        refresh_kpis()
+        get_room_index()
+        get_identity_keys()
+        get_analytics(list(ANALYTICS_VIEWS), MultiDict())
+
+# Serialization helpers
+
+def ensure_data_loaded():
+    """Lazily load any dataset that has not been loaded yet"""
+    revalidate_if_stale()
+    refresh_kpis()
+
+def take_data_snapshot():
+    """Capture references to the current globals so one response reads one dataset"""
+    with data_lock:
+        return {
+            'patients': patients_df,
+            'dashboard_stats': dashboard_stats,
+            'growth_metrics': growth_metrics
+        }
+
+def serialize_dashboard_stats(stats_df):
+    """Convert dashboard stats to a dictionary keyed by metric name"""
+    stats_dict = {}
+    if stats_df is not None:
+        for _, row in stats_df.iterrows():
+            stats_dict[row['csvmetric']] = {
+                'value': row['value'],
+                'progress': row['progress'],
+                'color': row['color']
+            }
+    return stats_dict
+
+def serialize_growth_metrics(metrics_df):
+    """Convert growth metrics to a dictionary keyed by metric name"""
+    metrics_dict = {}
+    if metrics_df is not None:
+        for _, row in metrics_df.iterrows():
+            metrics_dict[row['csvmetric']] = {
+                'growth_text': row['growth_text'],
+                'growth_type': row['growth_type'],
+                'overall': row['overall'],
+                'monthly': row['monthly'],
+                'day': row['day']
+            }
+    return metrics_dict
+
+def serialize_patients(df):
+    """Convert the patients dataframe to the /api/patients payload"""
+    patients_list = df.to_dict('records') if df is not None else []
+    
+    # Convert datetime to string for JSON serialization
+    for patient in patients_list:
+        if 'admitDate' in patient:
+            patient['admitDate'] = str(patient['admitDate'])[:10]  # YYYY-MM-DD format
+    
+    return {
+        'patients': patients_list,
+        'total': len(patients_list)
+    }
+
+def get_all_charts_data():
+    """Get every chart configuration keyed by chart name"""
+    return {
+        'newPatients': ChartDataProvider.get_new_patients_chart(),
+        'opdPatients': ChartDataProvider.get_opd_patients_chart(),
+        'hospitalSurvey': ChartDataProvider.get_hospital_survey_chart(),
+        'operations': ChartDataProvider.get_operations_chart(),
+        'visitors': ChartDataProvider.get_visitors_chart(),
+        'newPatient': ChartDataProvider.get_new_patient_chart(),
+        'heartSurgeries': ChartDataProvider.get_heart_surgeries_chart(),
+        'medicalTreatment': ChartDataProvider.get_medical_treatment_chart()
+    }
+
+# Read operations available to /api/batch and /api/bootstrap, keyed by the
+# path of the standalone endpoint they mirror
+BATCH_OPERATIONS = {
+    'dashboard-stats': lambda snapshot: serialize_dashboard_stats(snapshot['dashboard_stats']),
+    'growth-metrics': lambda snapshot: serialize_growth_metrics(snapshot['growth_metrics']),
+    'patients': lambda snapshot: serialize_patients(snapshot['patients']),
+    'charts/all': lambda snapshot: get_all_charts_data()
+}
+
+def run_batch_operations(names):
+    """Run several read operations against one snapshot of the data"""
+    revalidate_if_stale()
+    
+    results = {}
+    errors = {}
+    with data_lock:
+        # Recompute the KPIs under the same lock, so they match the patients snapshotted
+        refresh_kpis()
+        snapshot = take_data_snapshot()
+        for name in names:
+            operation = BATCH_OPERATIONS.get(name)
+            if operation is None:
+                errors[name] = 'Unknown operation'
+                continue
+            try:
+                results[name] = operation(snapshot)
+            except Exception as e:
+                print(f"Error running batch operation {name}: {e}")
+                errors[name] = str(e)
+    
+    return results, errors
+
 # API Routes
 
+@app.after_request
+def add_data_freshness_headers(response):
+    """Report where the default dataset came from on every API response"""
+    if request.path.startswith('/api/') and data_source['source'] is not None:
+        response.headers['X-Data-Source'] = data_source['source']
+        if data_source['fetched_at'] is not None:
+            response.headers['X-Data-Fetched-At'] = data_source['fetched_at'].isoformat()
+    return response
+
 @app.route('/')
 def index():
     """Serve the main dashboard page"""
@@ -570,7 +2020,9 @@ def health_check():
         'patients_loaded': patients_df is not None,
         'dashboard_stats_loaded': dashboard_stats is not None,
         'growth_metrics_loaded': growth_metrics is not None,
-        'patient_count': len(patients_df) if patients_df is not None else 0
+        'patient_count': len(patients_df) if patients_df is not None else 0,
+        'data_freshness': get_data_freshness(),
+        'journal': get_journal().describe() if JOURNAL_ENABLED else None
     })
 
 @app.route('/api/refresh-data', methods=['POST'])
@@ -580,7 +2032,8 @@ def refresh_data():
         initialize_data()
         return jsonify({
             'message': 'Data refreshed successfully',
-            'patients_count': len(patients_df) if patients_df is not None else 0
+            'patients_count': len(patients_df) if patients_df is not None else 0,
+            'data_freshness': get_data_freshness()
         })
     except Exception as e:
         print(f"Error refreshing data: {e}")
@@ -591,22 +2044,12 @@ def get_dashboard_stats():
     """Get dashboard statistics"""
     try:
         # Initialize data if not loaded
-        if dashboard_stats is None:
-            load_dashboard_stats()
+        ensure_data_loaded()
         
         if dashboard_stats is None:
             return jsonify({'error': 'Dashboard stats not loaded'}), 500
         
-        # Convert to dictionary with metric name as key
-        stats_dict = {}
-        for _, row in dashboard_stats.iterrows():
-            stats_dict[row['csvmetric']] = {
-                'value': row['value'],
-                'progress': row['progress'],
-                'color': row['color']
-            }
-        
-        return jsonify(stats_dict)
+        return jsonify(serialize_dashboard_stats(dashboard_stats))
     except Exception as e:
         print(f"Error getting dashboard stats: {e}")
         return jsonify({'error': str(e)}), 500
@@ -616,24 +2059,12 @@ def get_growth_metrics():
     """Get growth metrics"""
     try:
         # Initialize data if not loaded
-        if growth_metrics is None:
-            load_growth_metrics()
+        ensure_data_loaded()
         
         if growth_metrics is None:
             return jsonify({'error': 'Growth metrics not loaded'}), 500
         
-        # Convert to dictionary with metric name as key
-        metrics_dict = {}
-        for _, row in growth_metrics.iterrows():
-            metrics_dict[row['csvmetric']] = {
-                'growth_text': row['growth_text'],
-                'growth_type': row['growth_type'],
-                'overall': row['overall'],
-                'monthly': row['monthly'],
-                'day': row['day']
-            }
-        
-        return jsonify(metrics_dict)
+        return jsonify(serialize_growth_metrics(growth_metrics))
     except Exception as e:
         print(f"Error getting growth metrics: {e}")
         return jsonify({'error': str(e)}), 500
@@ -643,32 +2074,11 @@ def get_dashboard_data():
     """Get combined dashboard data (stats + growth metrics)"""
     try:
         # Initialize data if not loaded
-        if dashboard_stats is None:
-            load_dashboard_stats()
-        if growth_metrics is None:
-            load_growth_metrics()
+        ensure_data_loaded()
             
-        # Get dashboard stats
-        stats_dict = {}
-        if dashboard_stats is not None:
-            for _, row in dashboard_stats.iterrows():
-                stats_dict[row['csvmetric']] = {
-                    'value': row['value'],
-                    'progress': row['progress'],
-                    'color': row['color']
-                }
-        
-        # Get growth metrics
-        metrics_dict = {}
-        if growth_metrics is not None:
-            for _, row in growth_metrics.iterrows():
-                metrics_dict[row['csvmetric']] = {
-                    'growth_text': row['growth_text'],
-                    'growth_type': row['growth_type'],
-                    'overall': row['overall'],
-                    'monthly': row['monthly'],
-                    'day': row['day']
-                }
+        with data_lock:
+            stats_dict = serialize_dashboard_stats(dashboard_stats)
+            metrics_dict = serialize_growth_metrics(growth_metrics)
         
         return jsonify({
             'dashboard_stats': stats_dict,
@@ -682,23 +2092,37 @@ def get_dashboard_data():
 def get_patients():
     """Get all patients data"""
     try:
-        # Initialize data if not loaded
-        if patients_df is None:
-            load_csv_data()
-            
-        patients_list = patients_df.to_dict('records') if patients_df is not None else []
+        # Initialize data if not loaded, revalidating stale data in the background
+        revalidate_if_stale()
+        
+        with data_lock:
+            df = filter_patients_by_args(patients_df, request.args) if patients_df is not None else None
+            payload = serialize_patients(df)
+        payload['data_freshness'] = get_data_freshness()
+        return jsonify(payload)
+    except Exception as e:
+        print(f"Error getting patients: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/patients/duplicates', methods=['GET'])
+def get_duplicate_patients():
+    """Report patients sharing a normalized identity (?fields=name,phone,address)"""
+    try:
+        revalidate_if_stale()
+        
+        fields = request.args.get('fields')
+        fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
         
-        # Convert datetime to string for JSON serialization
-        for patient in patients_list:
-            if 'admitDate' in patient:
-                patient['admitDate'] = str(patient['admitDate'])[:10]  # YYYY-MM-DD format
+        with data_lock:
+            groups = find_duplicate_groups(patients_df, fields)
         
         return jsonify({
-            'patients': patients_list,
-            'total': len(patients_list)
+            'fields': fields or DUPLICATE_KEY_FIELDS,
+            'groups': groups,
+            'duplicate_records': sum(group['count'] - 1 for group in groups)
         })
     except Exception as e:
-        print(f"Error getting patients: {e}")
+        print(f"Error getting duplicate patients: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/patients/<int:patient_id>', methods=['GET'])
@@ -731,11 +2155,56 @@ def add_patient():
             if field not in patient_data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
         
+        unknown_fields = find_unknown_fields(patient_data.keys())
+        if unknown_fields:
+            return jsonify({'error': f'Unknown fields: {unknown_fields}'}), 400
+        
+        new_patient, invalid, report = validate_patients(pd.DataFrame([patient_data]))
+        if invalid.any():
+            return jsonify({'error': 'Patient failed validation', 'report': report}), 400
+        patient_data = new_patient.iloc[0].to_dict()
+        
+        check_room = request.args.get('check_room')
+        check_room = ENFORCE_ROOM_CAPACITY if check_room is None else check_room.lower() in ('1', 'true', 'yes')
+        room = normalize_room_numbers(pd.Series([patient_data['roomNo']])).iloc[0]
+        room = None if pd.isna(room) else room
+        
+        reject_duplicates = request.args.get('reject_duplicates', '').lower() in ('1', 'true', 'yes')
+        
         # Add patient to dataframe
         new_patient = pd.DataFrame([patient_data])
-        patients_df = pd.concat([patients_df, new_patient], ignore_index=True)
+        identity = int(build_identity_keys(new_patient).iloc[0])
+        with data_lock:
+            duplicate_of = find_identity_matches(identity)
+            if reject_duplicates and duplicate_of:
+                return jsonify({
+                    'error': 'Patient already exists',
+                    'duplicate_of': duplicate_of
+                }), 409
+            
+            if check_room and room is not None:
+                occupants = get_room_index().get(room, [])
+                if len(occupants) >= ROOM_CAPACITY:
+                    return jsonify({
+                        'error': f'Room {room} is full',
+                        'occupants': occupants
+                    }), 409
+            
+            previous_version = data_version
+            record = {'op': 'add', 'patient': patient_data}
+            # Journal first: if that fails, nothing was changed in memory
+            seq = record_mutation(record)
+            patients_df, _ = apply_mutation(patients_df, record)
+            mark_data_changed()
+            index_room_mutation(record, previous_version)
+            index_identity_mutation(record, previous_version)
         
-        return jsonify({'message': 'Patient added successfully', 'id': len(patients_df) - 1})
+        wait_for_durability(seq)
+        return jsonify({
+            'message': 'Patient added successfully',
+            'id': len(patients_df) - 1,
+            'duplicate_of': duplicate_of
+        })
     except Exception as e:
         print(f"Error adding patient: {e}")
         return jsonify({'error': str(e)}), 500
@@ -751,10 +2220,31 @@ def update_patient(patient_id):
         
         patient_data = request.json
         
+        unknown_fields = find_unknown_fields(patient_data.keys())
+        if unknown_fields:
+            return jsonify({'error': f'Unknown fields: {unknown_fields}'}), 400
+        
+        changes, invalid, report = validate_patients(pd.DataFrame([patient_data]), partial=True)
+        if invalid.any():
+            return jsonify({'error': 'Patient failed validation', 'report': report}), 400
+        patient_data = changes.iloc[0].to_dict()
+        
         # Update patient data
-        for key, value in patient_data.items():
-            patients_df.at[patient_id, key] = value
+        with data_lock:
+            # A concurrent delete may have shifted the IDs since the check above
+            if patients_df is None or patient_id >= len(patients_df):
+                return jsonify({'error': 'Patient not found'}), 404
+            
+            previous_version = data_version
+            record = {'op': 'update', 'id': patient_id, 'changes': patient_data}
+            # Journal first: if that fails, nothing was changed in memory
+            seq = record_mutation(record)
+            patients_df, _ = apply_mutation(patients_df, record)
+            mark_data_changed()
+            index_room_mutation(record, previous_version)
+            index_identity_mutation(record, previous_version)
         
+        wait_for_durability(seq)
         return jsonify({'message': 'Patient updated successfully'})
     except Exception as e:
         print(f"Error updating patient: {e}")
@@ -770,13 +2260,166 @@ def delete_patient(patient_id):
             return jsonify({'error': 'Patient not found'}), 404
         
         # Remove patient
-        patients_df = patients_df.drop(patients_df.index[patient_id]).reset_index(drop=True)
+        with data_lock:
+            # A concurrent delete may have shifted the IDs since the check above
+            if patients_df is None or patient_id >= len(patients_df):
+                return jsonify({'error': 'Patient not found'}), 404
+            
+            previous_version = data_version
+            record = {'op': 'delete', 'id': patient_id}
+            # Journal first: if that fails, nothing was changed in memory
+            seq = record_mutation(record)
+            patients_df, _ = apply_mutation(patients_df, record)
+            mark_data_changed()
+            index_room_mutation(record, previous_version)
+            index_identity_mutation(record, previous_version)
         
+        wait_for_durability(seq)
         return jsonify({'message': 'Patient deleted successfully'})
     except Exception as e:
         print(f"Error deleting patient: {e}")
         return jsonify({'error': str(e)}), 500
 
+def build_patient_mask(df, ids=None, filters=None):
+    """Build a boolean row mask from a list of patient IDs and/or column filters.
+
+    Filters map a column name to a value or a list of accepted values. Values
+    are compared as strings so CSV-loaded numbers match JSON strings.
+    """
+    if ids is None and not filters:
+        raise ValueError('Either ids or filter is required')
+    
+    mask = pd.Series(True, index=df.index)
+    
+    if ids is not None:
+        if not isinstance(ids, list):
+            raise ValueError('ids must be a list')
+        try:
+            positions = pd.to_numeric(pd.Series(ids), errors='raise').astype(int)
+        except (ValueError, TypeError):
+            raise ValueError('ids must be integers')
+        id_mask = pd.Series(False, index=df.index)
+        valid = positions[(positions >= 0) & (positions < len(df))]
+        id_mask.iloc[valid.to_numpy()] = True
+        mask &= id_mask
+    
+    if filters:
+        if not isinstance(filters, dict):
+            raise ValueError('filter must be an object')
+        for column, accepted in filters.items():
+            if column not in df.columns:
+                raise ValueError(f'Unknown column: {column}')
+            if not isinstance(accepted, list):
+                accepted = [accepted]
+            mask &= df[column].astype(str).isin([str(value) for value in accepted])
+    
+    return mask
+
+def filter_patients_by_args(df, args):
+    """Select the rows matching any query-string arguments named after a column.
+
+    Repeated arguments (``?doctor=Dr Mark&doctor=Dr Felix``) match any of the values.
+    """
+    filters = {column: args.getlist(column) for column in args if column in df.columns}
+    if not filters:
+        return df
+    return df[build_patient_mask(df, filters=filters)]
+
+@app.route('/api/patients', methods=['PATCH'])
+def bulk_update_patients():
+    """Apply the same changes to every patient matching an ID list or filter"""
+    try:
+        global patients_df
+        
+        data = request.get_json(silent=True) or {}
+        changes = data.get('changes')
+        
+        if not isinstance(changes, dict) or not changes:
+            return jsonify({'error': 'changes must be a non-empty object'}), 400
+        
+        unknown_fields = find_unknown_fields(changes.keys())
+        if unknown_fields:
+            return jsonify({'error': f'Unknown fields: {unknown_fields}'}), 400
+        
+        coerced_changes, invalid, report = validate_patients(pd.DataFrame([changes]), partial=True)
+        if invalid.any():
+            return jsonify({'error': 'Changes failed validation', 'report': report}), 400
+        changes = coerced_changes.iloc[0].to_dict()
+        
+        with data_lock:
+            if patients_df is None:
+                return jsonify({'error': 'No patient data loaded'}), 404
+            
+            previous_version = data_version
+            record = {'op': 'bulk_update', 'ids': data.get('ids'), 'filter': data.get('filter'), 'changes': changes}
+            mask = build_patient_mask(patients_df, record['ids'], record['filter']).to_numpy()
+            updated_count = int(mask.sum())
+            seq = None
+            if updated_count:
+                seq = record_mutation(record)
+                patients_df, _ = apply_mutation(patients_df, record, mask)
+                mark_data_changed()
+                index_room_mutation(record, previous_version, mask)
+                index_identity_mutation(record, previous_version, mask)
+        
+        wait_for_durability(seq)
+        return jsonify({'message': 'Patients updated successfully', 'updated': updated_count})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error bulk updating patients: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/patients', methods=['DELETE'])
+def bulk_delete_patients():
+    """Delete every patient matching an ID list or filter"""
+    try:
+        global patients_df
+        
+        data = request.get_json(silent=True) or {}
+        
+        with data_lock:
+            if patients_df is None:
+                return jsonify({'error': 'No patient data loaded'}), 404
+            
+            previous_version = data_version
+            record = {'op': 'bulk_delete', 'ids': data.get('ids'), 'filter': data.get('filter')}
+            mask = build_patient_mask(patients_df, record['ids'], record['filter']).to_numpy()
+            deleted_count = int(mask.sum())
+            seq = None
+            if deleted_count:
+                seq = record_mutation(record)
+                patients_df, _ = apply_mutation(patients_df, record, mask)
+                mark_data_changed()
+                index_room_mutation(record, previous_version, mask)
+                index_identity_mutation(record, previous_version, mask)
+        
+        wait_for_durability(seq)
+        return jsonify({'message': 'Patients deleted successfully', 'deleted': deleted_count})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error bulk deleting patients: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/rooms/occupancy', methods=['GET'])
+def get_rooms_occupancy():
+    """Get per-room and per-floor occupancy with free beds"""
+    try:
+        revalidate_if_stale()
+        
+        return jsonify(get_room_occupancy())
+    except Exception as e:
+        print(f"Error getting room occupancy: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/validation-report', methods=['GET'])
+def get_validation_report():
+    """Get the validation report from the most recent ingest"""
+    if last_validation_report is None:
+        return jsonify({'error': 'No validated ingest yet'}), 404
+    return jsonify(last_validation_report)
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Get statistics for data analysis"""
@@ -791,6 +2434,35 @@ def get_stats():
         print(f"Error getting stats: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/analytics', methods=['GET'])
+def get_all_analytics():
+    """Get every cohort analytics view for the (optionally filtered) patients"""
+    try:
+        revalidate_if_stale()
+        
+        return jsonify(get_analytics(list(ANALYTICS_VIEWS), request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error getting analytics: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/<view>', methods=['GET'])
+def get_analytics_view(view):
+    """Get one cohort analytics view"""
+    try:
+        if view not in ANALYTICS_VIEWS:
+            return jsonify({'error': f'Unknown analytics view: {view}', 'views': list(ANALYTICS_VIEWS)}), 404
+        
+        revalidate_if_stale()
+        
+        return jsonify(get_analytics([view], request.args)[view])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error getting {view} analytics: {e}")
+        return jsonify({'error': str(e)}), 500
+
 # Chart API Routes
 @app.route('/api/charts/new-patients', methods=['GET'])
 def get_new_patients_chart():
@@ -868,24 +2540,55 @@ def get_medical_treatment_chart():
 def get_all_charts():
     """Get all chart data in a single request"""
     try:
+        return jsonify(get_all_charts_data())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/bootstrap', methods=['GET'])
+def get_bootstrap():
+    """Get several read payloads in one response (?include=patients,charts/all)"""
+    try:
+        include = request.args.get('include')
+        if include:
+            names = [name.strip() for name in include.split(',') if name.strip()]
+        else:
+            names = list(BATCH_OPERATIONS.keys())
+        
+        results, errors = run_batch_operations(names)
+        
+        return jsonify({
+            'results': results,
+            'errors': errors
+        })
+    except Exception as e:
+        print(f"Error getting bootstrap data: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/batch', methods=['POST'])
+def run_batch():
+    """Run a list of read operations against one consistent dataset snapshot"""
+    try:
+        data = request.get_json(silent=True) or {}
+        names = data.get('operations')
+        
+        if not isinstance(names, list) or not names:
+            return jsonify({'error': 'operations must be a non-empty list'}), 400
+        
+        results, errors = run_batch_operations(names)
+        
         return jsonify({
-            'newPatients': ChartDataProvider.get_new_patients_chart(),
-            'opdPatients': ChartDataProvider.get_opd_patients_chart(),
-            'hospitalSurvey': ChartDataProvider.get_hospital_survey_chart(),
-            'operations': ChartDataProvider.get_operations_chart(),
-            'visitors': ChartDataProvider.get_visitors_chart(),
-            'newPatient': ChartDataProvider.get_new_patient_chart(),
-            'heartSurgeries': ChartDataProvider.get_heart_surgeries_chart(),
-            'medicalTreatment': ChartDataProvider.get_medical_treatment_chart()
+            'results': results,
+            'errors': errors
         })
     except Exception as e:
+        print(f"Error running batch: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/upload-csv', methods=['POST'])
 def upload_csv():
     """Upload and process CSV file"""
     try:
-        global patients_df
+        global patients_df, last_validation_report
         
         if 'file' not in request.files:
             return jsonify({'error': 'No file uploaded'}), 400
@@ -896,42 +2599,320 @@ def upload_csv():
         
         if file and file.filename.endswith('.csv'):
             # Read CSV file
-            patients_df = pd.read_csv(file)
+            uploaded_df = pd.read_csv(file)
             
             # Validate required columns
             required_columns = ['name', 'doctor', 'admitDate', 'disease', 'roomNo']
-            missing_columns = [col for col in required_columns if col not in patients_df.columns]
+            missing_columns = [col for col in required_columns if col not in uploaded_df.columns]
             
             if missing_columns:
                 return jsonify({'error': f'Missing columns: {missing_columns}'}), 400
             
+            # Invalid rows reject the whole upload unless ?invalid=drop, which
+            # also clears invalid optional values instead of dropping their rows
+            drop_invalid = request.args.get('invalid', 'reject').lower() == 'drop'
+            uploaded_df, invalid, report = validate_patients(uploaded_df, clear_optional=drop_invalid)
+            last_validation_report = report
+            if invalid.any():
+                if not drop_invalid:
+                    return jsonify({'error': 'CSV failed validation', 'report': report}), 400
+                uploaded_df = uploaded_df[~invalid].reset_index(drop=True)
+            if uploaded_df.empty:
+                return jsonify({'error': 'CSV has no valid patients', 'report': report}), 400
+            
+            policy = request.args.get('duplicates', DUPLICATE_POLICY).lower()
+            uploaded_df, duplicate_count = apply_duplicate_policy(uploaded_df, policy)
+            
+            replace_patients(uploaded_df, 'upload')
+            
             return jsonify({
                 'message': 'CSV uploaded successfully',
-                'patients_count': len(patients_df)
+                'patients_count': len(patients_df),
+                'duplicates': duplicate_count,
+                'duplicates_merged': policy == 'merge',
+                'invalid_rows_dropped': report['invalid_rows'],
+                'invalid_values_cleared': report['cleared_values']
             })
         else:
             return jsonify({'error': 'Invalid file format. Please upload a CSV file.'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/export-csv', methods=['GET'])
-def export_csv():
-    """Export patients data to CSV"""
+# Export formats: format name -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.file', 'arrow')
+}
+
+def serialize_export(df, export_format):
+    """Serialize a dataframe in one of the EXPORT_FORMATS"""
+    if export_format == 'csv':
+        return df.to_csv(index=False)
+    if export_format == 'ndjson':
+        return df.to_json(orient='records', lines=True, date_format='iso')
+    
+    # Columnar formats need pyarrow, which is an optional dependency
+    import pyarrow as pa
+    
+    if export_format == 'parquet':
+        import pyarrow.parquet as pq
+        buffer = pa.BufferOutputStream()
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buffer)
+        return buffer.getvalue().to_pybytes()
+    if export_format == 'arrow':
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        buffer = pa.BufferOutputStream()
+        with pa.ipc.new_file(buffer, table.schema) as writer:
+            writer.write_table(table)
+        return buffer.getvalue().to_pybytes()
+    
+    raise ValueError(f'Unsupported export format: {export_format}')
+
+def build_export_response(export_format, source_df=None):
+    """Export the filtered, projected patients data in the requested format"""
     try:
-        if patients_df is None:
-            return jsonify({'error': 'No data to export'}), 404
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'Invalid format. Choose one of: {list(EXPORT_FORMATS.keys())}'}), 400
         
-        # Convert to CSV
-        csv_data = patients_df.to_csv(index=False)
+        with data_lock:
+            source_df = patients_df if source_df is None else source_df
+            if source_df is None:
+                return jsonify({'error': 'No data to export'}), 404
+            
+            df = filter_patients_by_args(source_df, request.args)
+            
+            columns = request.args.get('columns')
+            if columns:
+                selected_columns = [col.strip() for col in columns.split(',') if col.strip()]
+                missing_columns = [col for col in selected_columns if col not in df.columns]
+                if missing_columns:
+                    return jsonify({'error': f'Unknown columns: {missing_columns}'}), 400
+                df = df[selected_columns]
+            
+            # Serialization runs after the lock is released, so it must never
+            # see the live frame that update routes edit in place
+            if df is source_df:
+                df = df.copy()
+        
+        try:
+            export_body = serialize_export(df, export_format)
+        except ImportError:
+            return jsonify({'error': f'{export_format} export requires pyarrow to be installed'}), 501
         
+        mimetype, extension = EXPORT_FORMATS[export_format]
         return Response(
-            csv_data,
-            mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment; filename=patients_export.csv'}
+            export_body,
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename=patients_export.{extension}'}
         )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/export', methods=['GET'])
+def export_data():
+    """Export patients data (?format=csv|ndjson|parquet|arrow&columns=name,doctor)"""
+    return build_export_response(request.args.get('format', 'csv').lower())
+
+@app.route('/api/export-csv', methods=['GET'])
+def export_csv():
+    """Export patients data to CSV"""
+    return build_export_response('csv')
+
+# Named dataset routes; the 'default' dataset is the one served by the routes above
+
+def dataset_error_response(dataset, e):
+    """Map dataset loading failures to an error response"""
+    if isinstance(e, KeyError):
+        return jsonify({'error': f'Unknown dataset: {dataset}'}), 404
+    if isinstance(e, ValueError):
+        return jsonify({'error': str(e)}), 400
+    if isinstance(e, requests.exceptions.RequestException):
+        return jsonify({'error': f'Could not load dataset {dataset}: {e}'}), 502
+    print(f"Error serving dataset {dataset}: {e}")
+    return jsonify({'error': str(e)}), 500
+
+@app.route('/api/datasets', methods=['GET'])
+def list_datasets():
+    """List named datasets and whether they are in memory or spilled to disk"""
+    datasets = dataset_cache.describe()
+    datasets[DEFAULT_DATASET] = {
+        'source': GOOGLE_SHEETS_CSV_URL,
+        'in_memory': patients_df is not None,
+        'spilled': False,
+        'bytes': int(patients_df.memory_usage(deep=True).sum()) if patients_df is not None else None,
+        'patients_count': len(patients_df) if patients_df is not None else None
+    }
+    return jsonify({
+        'datasets': datasets,
+        'budget_bytes': dataset_cache.budget_bytes
+    })
+
+@app.route('/api/datasets', methods=['POST'])
+def register_dataset():
+    """Register a named dataset backed by a Google Sheets CSV URL"""
+    name = None
+    try:
+        data = request.get_json(silent=True) or {}
+        name = data.get('name')
+        url = data.get('url')
+        
+        if not name or not url:
+            return jsonify({'error': 'name and url are required'}), 400
+        
+        if not url.startswith(SHEETS_URL_PREFIXES):
+            return jsonify({'error': 'Invalid Google Sheets URL'}), 400
+        
+        dataset_cache.register(name, url)
+        
+        return jsonify({'message': f'Dataset {name} registered successfully'})
+    except Exception as e:
+        return dataset_error_response(name, e)
+
+@app.route('/api/<dataset>/patients', methods=['GET'])
+def get_dataset_patients(dataset):
+    """Get patients of a named dataset"""
+    if dataset == DEFAULT_DATASET:
+        return get_patients()
+    try:
+        df = filter_patients_by_args(dataset_cache.get(dataset), request.args)
+        return jsonify(serialize_patients(df))
+    except Exception as e:
+        return dataset_error_response(dataset, e)
+
+@app.route('/api/<dataset>/patients/<int:patient_id>', methods=['GET'])
+def get_dataset_patient(dataset, patient_id):
+    """Get a specific patient of a named dataset"""
+    if dataset == DEFAULT_DATASET:
+        return get_patient(patient_id)
+    try:
+        df = dataset_cache.get(dataset)
+        if patient_id >= len(df):
+            return jsonify({'error': 'Patient not found'}), 404
+        return jsonify(serialize_patients(df.iloc[[patient_id]])['patients'][0])
+    except Exception as e:
+        return dataset_error_response(dataset, e)
+
+@app.route('/api/<dataset>/patients', methods=['POST'])
+def add_dataset_patient(dataset):
+    """Add a patient to a named dataset"""
+    if dataset == DEFAULT_DATASET:
+        return add_patient()
+    try:
+        patient_data = request.get_json(silent=True) or {}
+        
+        with dataset_cache.lock_for(dataset):
+            df = dataset_cache.get(dataset)
+            
+            unknown_fields = find_unknown_fields(patient_data.keys(), df)
+            if unknown_fields:
+                return jsonify({'error': f'Unknown fields: {unknown_fields}'}), 400
+            
+            new_patient, invalid, report = validate_patients(pd.DataFrame([patient_data]))
+            if invalid.any():
+                return jsonify({'error': 'Patient failed validation', 'report': report}), 400
+            
+            df = pd.concat([df, new_patient], ignore_index=True)
+            dataset_cache.put(dataset, df)
+        
+        return jsonify({'message': 'Patient added successfully', 'id': len(df) - 1})
+    except Exception as e:
+        return dataset_error_response(dataset, e)
+
+@app.route('/api/<dataset>/patients/<int:patient_id>', methods=['PUT'])
+def update_dataset_patient(dataset, patient_id):
+    """Update a patient of a named dataset"""
+    if dataset == DEFAULT_DATASET:
+        return update_patient(patient_id)
+    try:
+        patient_data = request.get_json(silent=True) or {}
+        
+        with dataset_cache.lock_for(dataset):
+            df = dataset_cache.get(dataset)
+            if patient_id >= len(df):
+                return jsonify({'error': 'Patient not found'}), 404
+            
+            unknown_fields = find_unknown_fields(patient_data.keys(), df)
+            if unknown_fields:
+                return jsonify({'error': f'Unknown fields: {unknown_fields}'}), 400
+            
+            changes, invalid, report = validate_patients(pd.DataFrame([patient_data]), partial=True)
+            if invalid.any():
+                return jsonify({'error': 'Patient failed validation', 'report': report}), 400
+            
+            # Copy so readers serializing the current frame never see a partial update
+            df = df.copy()
+            for key, value in changes.iloc[0].to_dict().items():
+                df.at[patient_id, key] = value
+            dataset_cache.put(dataset, df)
+        
+        return jsonify({'message': 'Patient updated successfully'})
+    except Exception as e:
+        return dataset_error_response(dataset, e)
+
+@app.route('/api/<dataset>/patients/<int:patient_id>', methods=['DELETE'])
+def delete_dataset_patient(dataset, patient_id):
+    """Delete a patient from a named dataset"""
+    if dataset == DEFAULT_DATASET:
+        return delete_patient(patient_id)
+    try:
+        with dataset_cache.lock_for(dataset):
+            df = dataset_cache.get(dataset)
+            if patient_id >= len(df):
+                return jsonify({'error': 'Patient not found'}), 404
+            
+            dataset_cache.put(dataset, df.drop(df.index[patient_id]).reset_index(drop=True))
+        
+        return jsonify({'message': 'Patient deleted successfully'})
+    except Exception as e:
+        return dataset_error_response(dataset, e)
+
+@app.route('/api/<dataset>/stats', methods=['GET'])
+def get_dataset_stats(dataset):
+    """Get statistics for a named dataset"""
+    if dataset == DEFAULT_DATASET:
+        return get_stats()
+    try:
+        df = dataset_cache.get(dataset)
+        return jsonify({
+            'diseases': get_disease_stats(df),
+            'monthly': get_monthly_stats(df),
+            'doctors': get_doctor_stats(df)
+        })
+    except Exception as e:
+        return dataset_error_response(dataset, e)
+
+@app.route('/api/<dataset>/export', methods=['GET'])
+def export_dataset(dataset):
+    """Export a named dataset (same arguments as /api/export)"""
+    if dataset == DEFAULT_DATASET:
+        return export_data()
+    try:
+        df = dataset_cache.get(dataset)
+        return build_export_response(request.args.get('format', 'csv').lower(), df)
+    except Exception as e:
+        return dataset_error_response(dataset, e)
+
+@app.route('/api/<dataset>/refresh', methods=['POST'])
+def refresh_dataset(dataset):
+    """Drop a named dataset's cached copy and reload it from its source"""
+    if dataset == DEFAULT_DATASET:
+        return refresh_data()
+    try:
+        with dataset_cache.lock_for(dataset):
+            dataset_cache.discard(dataset)
+            df = dataset_cache.get(dataset)
+        
+        return jsonify({
+            'message': f'Dataset {dataset} refreshed successfully',
+            'patients_count': len(df)
+        })
+    except Exception as e:
+        return dataset_error_response(dataset, e)
+
 @app.route('/api/update-sheets-url', methods=['POST'])
 def update_sheets_url():
     """Update Google Sheets URL"""
@@ -945,39 +2926,48 @@ def update_sheets_url():
             return jsonify({'error': 'URL is required'}), 400
         
         # Validate URL format
-        if not new_url.startswith('https://docs.google.com/spreadsheets/'):
+        if not new_url.startswith(SHEETS_URL_PREFIXES):
             return jsonify({'error': 'Invalid Google Sheets URL'}), 400
         
-        # Update URL
+        # Update URL and forget everything cached for the old sheet
         GOOGLE_SHEETS_CSV_URL = new_url
+        sheet_cache.update(text=None, etag=None, fetched_at=None)
+        sheet_breaker.reset()
         
         # Reload data from new URL
         load_csv_data()
-
-        load_csv_data()
         
         return jsonify({
             'message': 'Google Sheets URL updated successfully',
-            'patients_count': len(patients_df) if patients_df is not None else 0
+            'patients_count': len(patients_df) if patients_df is not None else 0,
+            'data_freshness': get_data_freshness()
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
-    # Load data when starting the server
-    load_csv_data()
+    # Load data when starting the server, replaying journaled edits if there are any
+    initialize_data()
     
     print("Hospital Dashboard Backend Started")
     print("Available endpoints:")
     print("  GET  /api/patients - Get all patients")
     print("  POST /api/patients - Add new patient")
+    print("  GET  /api/patients/duplicates - Duplicate patient report")
     print("  GET  /api/patients/<id> - Get specific patient")
     print("  PUT  /api/patients/<id> - Update patient")
     print("  DELETE /api/patients/<id> - Delete patient")
+    print("  PATCH /api/patients - Bulk update patients by ids or filter")
+    print("  DELETE /api/patients - Bulk delete patients by ids or filter")
     print("  GET  /api/stats - Get statistics for data analysis")
+    print("  GET  /api/analytics - Cohort analytics (filter by column, admitted_from, admitted_to)")
+    print("  GET  /api/analytics/<view> - age-bands, gender-disease, weekday-admissions or length-of-stay")
+    print("  GET  /api/rooms/occupancy - Room and floor occupancy")
     print("  POST /api/refresh-data - Refresh data from Google Sheets")
     print("  POST /api/upload-csv - Upload CSV file")
+    print("  GET  /api/validation-report - Validation report from the last ingest")
     print("  GET  /api/export-csv - Export data to CSV")
+    print("  GET  /api/export - Export data as csv, ndjson, parquet or arrow")
     print("  POST /api/update-sheets-url - Update Google Sheets URL")
     print("\nChart endpoints:")
     print("  GET  /api/charts/new-patients - New patients chart")
@@ -991,5 +2981,15 @@ if __name__ == '__main__':
     print("  GET  /api/dashboard-stats - Dashboard stats")
     print("  GET  /api/growth-metrics - Growth metrics")
     print("  GET  /api/charts/all - All charts data")
+    print("  GET  /api/bootstrap - Several payloads in one response (?include=...)")
+    print("  POST /api/batch - Run several read operations on one snapshot")
+    print("\nNamed dataset endpoints:")
+    print("  GET  /api/datasets - List datasets")
+    print("  POST /api/datasets - Register a dataset source")
+    print("  GET/POST /api/<dataset>/patients - Patients of a dataset")
+    print("  GET/PUT/DELETE /api/<dataset>/patients/<id> - Patient of a dataset")
+    print("  GET  /api/<dataset>/stats - Dataset statistics")
+    print("  GET  /api/<dataset>/export - Export a dataset")
+    print("  POST /api/<dataset>/refresh - Reload a dataset from its source")
     
     app.run(debug=True)
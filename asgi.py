@@ -0,0 +1,276 @@
+"""ASGI entry point that serves the dashboard from an event loop.
+
+    uvicorn asgi:application
+    gunicorn -k uvicorn.workers.UvicornWorker asgi:application
+
+Run a single process: patients_df lives in process memory and the mutation
+journal has one writer, so startup fails if another process holds the journal.
+Concurrency comes from the event loop and ASYNC_POOL_SIZE.
+
+Request bodies are read and responses are written on the event loop, so slow
+clients never hold a thread. The Flask routes in app.py run on a bounded
+thread pool. POST /api/refresh-data fetches the Google Sheet with httpx on the
+loop and only parses it in the pool, and GET /api/events streams data changes
+as server-sent events without tying up a thread per connection.
+"""
+
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+import app as dashboard
+
+# Threads available to Flask routes and pandas work, bytes per response body
+# message, and how often /api/events checks for data changes (seconds)
+ASYNC_POOL_SIZE = int(os.environ.get('ASYNC_POOL_SIZE', 8))
+RESPONSE_CHUNK_SIZE = 64 * 1024
+EVENT_POLL_INTERVAL = float(os.environ.get('EVENT_POLL_INTERVAL', 1))
+EVENT_KEEPALIVE_INTERVAL = 15
+
+worker_pool = ThreadPoolExecutor(max_workers=ASYNC_POOL_SIZE, thread_name_prefix='dashboard')
+http_client = None
+
+async def run_in_pool(func, *args):
+    """Run blocking or CPU-heavy work on the bounded worker pool"""
+    return await asyncio.get_running_loop().run_in_executor(worker_pool, func, *args)
+
+async def read_body(receive):
+    """Read the full request body; returns None if the client disconnected"""
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return bytes(body)
+
+def build_environ(scope, body):
+    """Build a WSGI environ from an ASGI HTTP scope"""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server_name),
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        'CONTENT_LENGTH': str(len(body))
+    }
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+
+    return environ
+
+def run_wsgi(environ):
+    """Call the Flask app and collect its complete response"""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = headers
+        return lambda data: None
+
+    result = dashboard.app(environ, start_response)
+    try:
+        response['body'] = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response
+
+async def send_response(send, status, headers, body):
+    """Send a complete response, writing the body in chunks on the loop"""
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    })
+    for offset in range(0, len(body), RESPONSE_CHUNK_SIZE):
+        await send({
+            'type': 'http.response.body',
+            'body': body[offset:offset + RESPONSE_CHUNK_SIZE],
+            'more_body': True
+        })
+    await send({'type': 'http.response.body', 'body': b''})
+
+async def send_json(send, data, status=200):
+    body = json.dumps(data, default=str).encode('utf-8')
+    await send_response(send, status, [
+        ('Content-Type', 'application/json'),
+        ('Access-Control-Allow-Origin', '*')
+    ], body)
+
+async def call_flask(scope, receive, send):
+    """Serve a request through the Flask app on the worker pool"""
+    body = await read_body(receive)
+    if body is None:
+        return
+
+    response = await run_in_pool(run_wsgi, build_environ(scope, body))
+    await send_response(send, response['status'], response['headers'], response['body'])
+
+async def fetch_sheet_payload_async():
+    """Async twin of app.fetch_sheet_payload that keeps the network wait on the loop"""
+    global http_client
+
+    if not dashboard.sheet_breaker.allow_request():
+        raise dashboard.SheetUnavailable('Google Sheets circuit is open')
+
+    if http_client is None:
+        http_client = httpx.AsyncClient(follow_redirects=True)
+
+    try:
+        response = await http_client.get(
+            dashboard.GOOGLE_SHEETS_CSV_URL,
+            timeout=5,
+            headers=dashboard.sheet_request_headers()
+        )
+        if response.status_code != 304:
+            response.raise_for_status()
+    except httpx.HTTPError:
+        dashboard.sheet_breaker.record_failure()
+        raise
+
+    return await run_in_pool(
+        dashboard.record_sheet_response,
+        response.status_code,
+        response.text,
+        response.headers.get('ETag')
+    )
+
+async def refresh_data(scope, receive, send):
+    """Async variant of POST /api/refresh-data"""
+    if await read_body(receive) is None:
+        return
+
+    try:
+        try:
+            text, changed = await fetch_sheet_payload_async()
+            await run_in_pool(dashboard.apply_sheet_payload, text, changed)
+        except httpx.TimeoutException:
+            await run_in_pool(dashboard.recover_from_sheet_failure, 'Google Sheets request timed out')
+        except httpx.HTTPError as e:
+            await run_in_pool(dashboard.recover_from_sheet_failure, f'Error loading from Google Sheets: {e}')
+        except Exception as e:
+            await run_in_pool(dashboard.recover_from_sheet_failure, dashboard.describe_sheet_error(e))
+
+        await run_in_pool(dashboard.refresh_kpis)
+
+        await send_json(send, {
+            'message': 'Data refreshed successfully',
+            'patients_count': len(dashboard.patients_df) if dashboard.patients_df is not None else 0,
+            'data_freshness': dashboard.get_data_freshness()
+        })
+    except Exception as e:
+        print(f"Error refreshing data: {e}")
+        await send_json(send, {'error': str(e)}, 500)
+
+async def stream_events(scope, receive, send):
+    """GET /api/events: push a server-sent event whenever the patient data changes"""
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        disconnected.set()
+
+    watcher = asyncio.create_task(watch_disconnect())
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'access-control-allow-origin', b'*')
+        ]
+    })
+
+    last_version = None
+    idle = 0.0
+    try:
+        while not disconnected.is_set():
+            if dashboard.data_version != last_version:
+                last_version = dashboard.data_version
+                payload = json.dumps({
+                    'data_version': last_version,
+                    'data_freshness': dashboard.get_data_freshness()
+                }, default=str)
+                message = f'event: data-changed\ndata: {payload}\n\n'
+                idle = 0.0
+            elif idle >= EVENT_KEEPALIVE_INTERVAL:
+                message = ': keep-alive\n\n'
+                idle = 0.0
+            else:
+                message = None
+
+            if message:
+                await send({'type': 'http.response.body', 'body': message.encode('utf-8'), 'more_body': True})
+
+            try:
+                await asyncio.wait_for(disconnected.wait(), EVENT_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                idle += EVENT_POLL_INTERVAL
+    finally:
+        watcher.cancel()
+
+# Routes handled natively on the event loop; everything else goes to Flask
+ASYNC_ROUTES = {
+    ('POST', '/api/refresh-data'): refresh_data,
+    ('GET', '/api/events'): stream_events
+}
+
+async def lifespan(receive, send):
+    global http_client
+
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                # Fails if another server process already holds the journal
+                await run_in_pool(dashboard.get_journal)
+            except Exception as e:
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await run_in_pool(dashboard.initialize_data)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if http_client is not None:
+                await http_client.aclose()
+                http_client = None
+            worker_pool.shutdown(wait=False)
+            dashboard.close_journal()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def application(scope, receive, send):
+    """ASGI application"""
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    handler = ASYNC_ROUTES.get((scope['method'], scope['path']), call_flask)
+    await handler(scope, receive, send)
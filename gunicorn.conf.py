@@ -0,0 +1,66 @@
+"""gunicorn settings for wsgi.py; every value can be overridden from the environment."""
+
+import multiprocessing
+import os
+import sys
+
+from gunicorn.arbiter import Arbiter
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+
+# patients_df lives in process memory, so a second worker would hold its own
+# diverging copy of the data. Scale with threads; data_lock keeps them consistent.
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', multiprocessing.cpu_count() * 2))
+
+# Read-only deployments (JOURNAL_ENABLED=false) can opt in to several workers,
+# accepting that edits made through one worker are invisible to the others
+ALLOW_MULTIPLE_WORKERS = os.environ.get('ALLOW_MULTIPLE_WORKERS', 'false').lower() == 'true'
+
+# Load the dataset once in the master and fork workers from it (see wsgi.py).
+# This makes worker starts and recycles cheap; it does not save memory with
+# one worker, since the master's copy goes stale (and stops being shared) as
+# soon as the worker changes the data
+preload_app = True
+
+# Recycle workers after a jittered number of requests so they do not all
+# restart at once; in-flight requests get graceful_timeout to finish
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = 5
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+
+def check_worker_count(server, workers):
+    """Refuse to run several workers unless explicitly allowed"""
+    if workers <= 1:
+        return
+    if not ALLOW_MULTIPLE_WORKERS:
+        server.log.error(
+            "Refusing to start %s workers: each worker would keep its own copy of the patient data. "
+            "Scale with GUNICORN_THREADS, or set ALLOW_MULTIPLE_WORKERS=true for read-only use", workers
+        )
+        # The boot-error status makes the master halt instead of respawning
+        sys.exit(Arbiter.WORKER_BOOT_ERROR)
+    if os.environ.get('JOURNAL_ENABLED', 'true').lower() == 'true':
+        server.log.error("Refusing to start %s workers with JOURNAL_ENABLED: the journal supports one process", workers)
+        sys.exit(Arbiter.WORKER_BOOT_ERROR)
+
+def on_starting(server):
+    check_worker_count(server, server.cfg.workers)
+
+def post_fork(server, worker):
+    # Also covers workers added at runtime with SIGTTIN
+    check_worker_count(server, server.num_workers)
+    entry = sys.modules.get('wsgi')
+    if entry is not None:
+        entry.after_fork()
+
+def post_worker_init(worker):
+    # Runs after the app is loaded and before the worker accepts connections
+    entry = sys.modules.get('wsgi')
+    if entry is not None:
+        entry.prepare_worker()
@@ -0,0 +1,303 @@
+"""Append-only journal of patient mutations with group-commit fsync.
+
+Each mutation is one JSON line tagged with a sequence number. Writers queue
+their line and wait; a single flusher thread writes everything queued since
+the last commit and fsyncs once, so concurrent writers share the cost of one
+fsync. A snapshot (a Parquet file recording the sequence number it includes)
+bounds recovery: compaction rotates the journal file under the lock, writes
+the snapshot outside it, then drops the rotated file.
+
+If a write or fsync fails the journal enters a failed state: waiting writers
+are woken and every later append() or wait() raises JournalFailed, since the
+file's contents can no longer be trusted. Restarting the process recovers
+from the last durable record.
+
+Sequence numbers and rotation assume a single writer, so an open journal holds
+an exclusive lock on journal.lock; a second process waits for it and then
+fails rather than interleave its records.
+"""
+
+import fcntl
+import json
+import os
+import stat
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+class JournalFailed(RuntimeError):
+    """A journal write failed, so mutations can no longer be made durable"""
+
+def ensure_private_dir(path):
+    """Create a directory only this user can access, refusing one someone else controls"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise PermissionError(f'{path} must be a directory owned by the dashboard user')
+    if info.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
+
+def write_frame(df, path, metadata=None):
+    """Write a dataframe to Parquet atomically, with string key/value metadata"""
+    df = df.copy()
+    for column in df.columns[df.dtypes == object]:
+        # Parquet columns need one type; edits can leave mixed values behind
+        if pd.api.types.infer_dtype(df[column], skipna=True) not in ('string', 'empty'):
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+
+    table = pa.Table.from_pandas(df)
+    if metadata:
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            **{key.encode(): str(value).encode() for key, value in metadata.items()}
+        })
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pq.write_table(table, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def read_frame_metadata(path):
+    """The metadata write_frame stored with a dataframe"""
+    metadata = pq.read_schema(path).metadata or {}
+    return {key.decode(): value.decode() for key, value in metadata.items() if not key.startswith(b'pandas')}
+
+def read_frame(path):
+    return pq.read_table(path).to_pandas()
+
+def encode_value(value):
+    """JSON fallback for numpy scalars, pandas NA and timestamps"""
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+class MutationJournal:
+    """Durable log of patient mutations on top of the last snapshot"""
+
+    def __init__(self, directory, commit_interval=0.002, lock_timeout=30):
+        self.directory = directory
+        self.commit_interval = commit_interval
+        self.journal_path = os.path.join(directory, 'journal.jsonl')
+        self.rotated_path = os.path.join(directory, 'journal.rotated.jsonl')
+        self.snapshot_path = os.path.join(directory, 'snapshot.parquet')
+
+        ensure_private_dir(directory)
+        self.lock_file = self.acquire_process_lock(lock_timeout)
+        self.closed = False
+        self.error = None
+        # condition guards the queue and sequence numbers; write_lock guards the
+        # file, so appends never wait behind an fsync in progress
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.compaction_lock = threading.Lock()
+        self.pending = []
+        self.last_seq = self.find_last_seq()
+        self.durable_seq = self.last_seq
+        self.records_since_snapshot = 0
+        self.file = open(self.journal_path, 'ab')
+
+        self.flusher = threading.Thread(target=self.flush_loop, name='journal-flusher', daemon=True)
+        self.flusher.start()
+
+    def acquire_process_lock(self, timeout):
+        """Take the single-writer lock, waiting up to timeout seconds for another process to let go"""
+        lock_file = open(os.path.join(self.directory, 'journal.lock'), 'a')
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return lock_file
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    lock_file.close()
+                    raise RuntimeError(
+                        f'Journal {self.directory} is in use by another process; '
+                        'run a single server process or give each its own JOURNAL_DIR'
+                    )
+                time.sleep(0.1)
+
+    def close(self):
+        """Write anything queued, stop the flusher and release the process lock"""
+        try:
+            with self.write_lock:
+                try:
+                    self.write_pending()
+                finally:
+                    self.file.close()
+        finally:
+            with self.condition:
+                self.closed = True
+                self.condition.notify_all()
+            fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+            self.lock_file.close()
+
+    def read_records(self, path):
+        records = []
+        if not os.path.exists(path):
+            return records
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A torn final line from a crash mid-write was never acknowledged
+                    break
+        return records
+
+    def read_snapshot_metadata(self):
+        if not os.path.exists(self.snapshot_path):
+            return {}
+        return read_frame_metadata(self.snapshot_path)
+
+    def read_snapshot_seq(self):
+        return int(self.read_snapshot_metadata().get('seq', 0))
+
+    def find_last_seq(self):
+        seq = self.read_snapshot_seq()
+        for path in (self.rotated_path, self.journal_path):
+            records = self.read_records(path)
+            if records:
+                seq = max(seq, records[-1]['seq'])
+        return seq
+
+    def load(self):
+        """Return the snapshot dataframe (or None), the records made after it and the snapshot's metadata"""
+        if not os.path.exists(self.snapshot_path):
+            return None, [], {}
+        df = read_frame(self.snapshot_path)
+        metadata = self.read_snapshot_metadata()
+        snapshot_seq = int(metadata.pop('seq', 0))
+        records = [
+            record
+            for path in (self.rotated_path, self.journal_path)
+            for record in self.read_records(path)
+            if record['seq'] > snapshot_seq
+        ]
+        self.records_since_snapshot = len(records)
+        return df, records, metadata
+
+    def check_failed(self):
+        """Raise JournalFailed if a write failed; caller holds condition"""
+        if self.error is not None:
+            raise JournalFailed(f'Journal write failed: {self.error}') from self.error
+
+    def append(self, record):
+        """Queue a mutation and return its sequence number; call wait() for durability"""
+        with self.condition:
+            self.check_failed()
+            self.last_seq += 1
+            record = dict(record, seq=self.last_seq)
+            self.pending.append(json.dumps(record, default=encode_value).encode('utf-8') + b'\n')
+            self.records_since_snapshot += 1
+            self.condition.notify_all()
+            return self.last_seq
+
+    def wait(self, seq, timeout=None):
+        """Block until the mutation with this sequence number is fsynced.
+
+        Raises JournalFailed if the journal failed first, and TimeoutError if
+        the fsync takes longer than timeout seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while self.durable_seq < seq:
+                self.check_failed()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f'Journal mutation {seq} was not made durable within {timeout}s')
+                self.condition.wait(remaining)
+
+    def write_pending(self):
+        """Write and fsync everything queued; caller holds write_lock"""
+        with self.condition:
+            self.check_failed()
+            if not self.pending:
+                return
+            lines, self.pending = self.pending, []
+            seq = self.last_seq
+        try:
+            self.file.write(b''.join(lines))
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        except Exception as e:
+            with self.condition:
+                self.error = e
+                self.condition.notify_all()
+            raise
+        with self.condition:
+            self.durable_seq = seq
+            self.condition.notify_all()
+
+    def flush_loop(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if self.closed:
+                    return
+            # Let concurrent writers join this commit before paying for the fsync
+            time.sleep(self.commit_interval)
+            try:
+                with self.write_lock:
+                    self.write_pending()
+            except Exception as e:
+                # write_pending has failed the journal and woken the waiters
+                print(f"Journal flusher stopped: {e}")
+                return
+
+    def begin_compaction(self, df, replaced=False):
+        """Rotate the journal and capture the state to snapshot.
+
+        Must be called while no mutation can be applied (the caller holds the
+        data lock) so df matches the last journaled sequence number. When the
+        whole dataset was replaced, replaced=True gives the snapshot a sequence
+        number of its own, so another process can tell it is newer than what
+        it loaded. Returns the arguments for finish_compaction(), which can
+        run without the lock and must always follow.
+        """
+        self.compaction_lock.acquire()
+        with self.write_lock:
+            self.write_pending()
+            self.file.close()
+            if os.path.exists(self.rotated_path):
+                # A previous compaction did not finish; keep its records too
+                with open(self.rotated_path, 'ab') as rotated, open(self.journal_path, 'rb') as current:
+                    rotated.write(current.read())
+                os.remove(self.journal_path)
+            else:
+                os.replace(self.journal_path, self.rotated_path)
+            self.file = open(self.journal_path, 'ab')
+        with self.condition:
+            if replaced:
+                self.last_seq += 1
+            self.records_since_snapshot = 0
+            return df.copy(), self.last_seq
+
+    def finish_compaction(self, df, seq, metadata=None):
+        """Write the snapshot atomically, with string metadata, and drop the rotated journal"""
+        try:
+            write_frame(df, self.snapshot_path, {**(metadata or {}), 'seq': seq})
+            with self.condition:
+                # A replaced dataset's sequence number is durable with its snapshot
+                self.durable_seq = max(self.durable_seq, seq)
+            if os.path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+        finally:
+            self.compaction_lock.release()
+
+    def describe(self):
+        return {
+            'directory': self.directory,
+            'last_seq': self.last_seq,
+            'durable_seq': self.durable_seq,
+            'records_since_snapshot': self.records_since_snapshot,
+            'error': str(self.error) if self.error is not None else None
+        }
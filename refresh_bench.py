@@ -0,0 +1,266 @@
+"""Measure sheet refresh cost against the local Google Sheets stand-in.
+
+    python refresh_bench.py --rows 50000 --readers 8 --duration 10
+
+Starts sheet_standin.py and the dashboard (a threaded werkzeug server) in this
+process, then reports:
+
+    parse       parse_sheet_payload throughput for each --parse-sizes entry
+    load        load_csv_data latency per ETag mode (304, unchanged body, edited)
+    http        POST /api/refresh-data and /api/update-sheets-url latency
+    failures    refresh latency while the sheet errors or times out
+    reads       read latency with and without refreshes running concurrently
+
+Sheet cache and journal files go to a temporary directory unless
+SHEET_CACHE_DIR / JOURNAL_DIR are set. Use --json for machine-readable output.
+"""
+
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from statistics import median
+
+# The dashboard reads its configuration at import time
+bench_dir = tempfile.mkdtemp(prefix='hospital_dashboard_bench_')
+os.environ.setdefault('SHEET_CACHE_DIR', os.path.join(bench_dir, 'sheets'))
+os.environ.setdefault('JOURNAL_DIR', os.path.join(bench_dir, 'journal'))
+
+import requests
+from werkzeug.serving import make_server
+
+from sheet_standin import generate_patients_csv, start_standin
+
+def summarize(samples):
+    """Latency percentiles in milliseconds"""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 2)
+
+    return {
+        'count': len(ordered),
+        'p50_ms': round(median(ordered) * 1000, 2),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': round(ordered[-1] * 1000, 2)
+    }
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def configure_standin(standin_url, **settings):
+    response = requests.post(standin_url, json=settings, timeout=60)
+    response.raise_for_status()
+
+def bench_parse(dashboard, sizes, repeat):
+    results = []
+    for rows in sizes:
+        text = generate_patients_csv(rows, invalid_rate=0.01)
+        samples = [timed(dashboard.parse_sheet_payload, text)[0] for _ in range(repeat)]
+        best = min(samples)
+        results.append({
+            'rows': rows,
+            'bytes': len(text),
+            'seconds': summarize(samples),
+            'rows_per_second': round(rows / best),
+            'mb_per_second': round(len(text) / best / 1e6, 2)
+        })
+    return results
+
+def bench_load(dashboard, control_url, refreshes):
+    results = {}
+    for mode in ('strong', 'none', 'rotate'):
+        configure_standin(control_url, etag_mode=mode)
+        dashboard.sheet_cache.update(text=None, etag=None, fetched_at=None)
+        cold, _ = timed(dashboard.load_csv_data)
+        warm = [timed(dashboard.load_csv_data)[0] for _ in range(refreshes)]
+        results[mode] = {'cold_ms': round(cold * 1000, 2), 'warm': summarize(warm)}
+    return results
+
+def bench_http(app_url, control_url, sheet_url, refreshes):
+    session = requests.Session()
+    results = {}
+    for mode in ('strong', 'rotate'):
+        configure_standin(control_url, etag_mode=mode)
+        samples = []
+        for _ in range(refreshes):
+            elapsed, response = timed(session.post, f'{app_url}/api/refresh-data', timeout=120)
+            response.raise_for_status()
+            samples.append(elapsed)
+        results[f'refresh-data ({mode})'] = summarize(samples)
+
+    configure_standin(control_url, etag_mode='strong')
+    samples = []
+    for _ in range(refreshes):
+        elapsed, response = timed(session.post, f'{app_url}/api/update-sheets-url', json={'url': sheet_url}, timeout=120)
+        response.raise_for_status()
+        samples.append(elapsed)
+    results['update-sheets-url'] = summarize(samples)
+    return results
+
+def bench_failures(dashboard, app_url, control_url, refreshes):
+    session = requests.Session()
+    results = {}
+    scenarios = {
+        'errors': {'error_rate': 1.0, 'timeout_rate': 0.0},
+        # Sheet requests time out after 5 seconds, so keep this one short
+        'timeouts': {'error_rate': 0.0, 'timeout_rate': 1.0, 'hang': 6.0}
+    }
+    for name, settings in scenarios.items():
+        configure_standin(control_url, etag_mode='rotate', **settings)
+        dashboard.sheet_breaker.reset()
+        samples = []
+        count = refreshes if name == 'errors' else dashboard.sheet_breaker.failure_threshold + 1
+        for _ in range(count):
+            elapsed, response = timed(session.post, f'{app_url}/api/refresh-data', timeout=120)
+            samples.append(elapsed)
+        results[name] = {
+            'latency': summarize(samples),
+            'first_ms': round(samples[0] * 1000, 2),
+            'last_ms': round(samples[-1] * 1000, 2),
+            'circuit': dashboard.sheet_breaker.describe()['state'],
+            'source': response.json().get('data_freshness', {}).get('source')
+        }
+    configure_standin(control_url, etag_mode='strong', error_rate=0.0, timeout_rate=0.0)
+    dashboard.sheet_breaker.reset()
+    return results
+
+def run_readers(app_url, paths, readers, duration, refresh_interval=None):
+    """Hammer read endpoints, optionally refreshing (edited sheet) in a loop"""
+    stop = threading.Event()
+    read_samples = []
+    refresh_samples = []
+    errors = []
+    lock = threading.Lock()
+
+    def reader(offset):
+        session = requests.Session()
+        samples = []
+        i = offset
+        while not stop.is_set():
+            path = paths[i % len(paths)]
+            i += 1
+            try:
+                elapsed, response = timed(session.get, f'{app_url}{path}', timeout=120)
+                if response.status_code >= 400:
+                    errors.append(f'{path}: {response.status_code}')
+                samples.append(elapsed)
+            except requests.RequestException as e:
+                errors.append(f'{path}: {e}')
+        with lock:
+            read_samples.extend(samples)
+
+    def refresher():
+        session = requests.Session()
+        while not stop.is_set():
+            elapsed, _ = timed(session.post, f'{app_url}/api/refresh-data', timeout=120)
+            refresh_samples.append(elapsed)
+            stop.wait(refresh_interval)
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    if refresh_interval is not None:
+        threads.append(threading.Thread(target=refresher))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    result = {
+        'reads': summarize(read_samples),
+        'reads_per_second': round(len(read_samples) / duration, 1),
+        'errors': len(errors)
+    }
+    if refresh_interval is not None:
+        result['refreshes'] = summarize(refresh_samples)
+    return result
+
+def bench_reads(app_url, control_url, paths, readers, duration, refresh_interval):
+    configure_standin(control_url, etag_mode='strong')
+    requests.post(f'{app_url}/api/refresh-data', timeout=120).raise_for_status()
+    baseline = run_readers(app_url, paths, readers, duration)
+
+    configure_standin(control_url, etag_mode='rotate')
+    under_refresh = run_readers(app_url, paths, readers, duration, refresh_interval)
+    configure_standin(control_url, etag_mode='strong')
+    return {'baseline': baseline, 'with_refreshes': under_refresh}
+
+def print_summary(name, data, indent='  '):
+    if isinstance(data, dict) and 'count' not in data:
+        print(f'{indent}{name}:')
+        for key, value in data.items():
+            print_summary(key, value, indent + '  ')
+    elif isinstance(data, list):
+        print(f'{indent}{name}:')
+        for item in data:
+            print(f'{indent}  {item}')
+    else:
+        print(f'{indent}{name}: {data}')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Google Sheets refreshes against a local stand-in')
+    parser.add_argument('--rows', type=int, default=20000, help='patients served by the stand-in')
+    parser.add_argument('--latency', type=float, default=0.05, help='stand-in response latency in seconds')
+    parser.add_argument('--parse-sizes', default='1000,10000,100000', help='comma-separated row counts to parse')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per parse size')
+    parser.add_argument('--refreshes', type=int, default=5, help='refreshes per load/http scenario')
+    parser.add_argument('--readers', type=int, default=8, help='concurrent reader threads')
+    parser.add_argument('--duration', type=float, default=10, help='seconds per read-load phase')
+    parser.add_argument('--refresh-interval', type=float, default=0.5, help='pause between concurrent refreshes')
+    parser.add_argument('--read-paths', default='/api/dashboard-data,/api/stats,/api/charts/all,/api/rooms/occupancy')
+    parser.add_argument('--skip', default='', help='comma-separated phases to skip (parse,load,http,failures,reads)')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+    skip = set(filter(None, args.skip.split(',')))
+
+    standin, sheet_url = start_standin(rows=args.rows, latency=args.latency)
+    host, port = standin.server_address[:2]
+    control_url = f'http://{host}:{port}/control'
+    os.environ['GOOGLE_SHEETS_CSV_URL'] = sheet_url
+    os.environ['SHEETS_URL_PREFIXES'] = f'http://{host}:{port}/spreadsheets/'
+
+    import app as dashboard
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, dashboard.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    app_url = f'http://127.0.0.1:{server.server_port}'
+    dashboard.initialize_data()
+
+    results = {'config': {'rows': args.rows, 'latency': args.latency, 'readers': args.readers,
+                          'journal': dashboard.JOURNAL_ENABLED, 'sheet_url': sheet_url}}
+    if 'parse' not in skip:
+        sizes = [int(size) for size in args.parse_sizes.split(',') if size]
+        results['parse'] = bench_parse(dashboard, sizes, args.repeat)
+    if 'load' not in skip:
+        results['load'] = bench_load(dashboard, control_url, args.refreshes)
+    if 'http' not in skip:
+        results['http'] = bench_http(app_url, control_url, sheet_url, args.refreshes)
+    if 'failures' not in skip:
+        results['failures'] = bench_failures(dashboard, app_url, control_url, args.refreshes)
+    if 'reads' not in skip:
+        paths = [path for path in args.read_paths.split(',') if path]
+        results['reads'] = bench_reads(app_url, control_url, paths, args.readers, args.duration, args.refresh_interval)
+
+    results['standin'] = requests.get(control_url, timeout=10).json()['counters']
+    server.shutdown()
+    standin.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print("Refresh benchmark results")
+        for name, data in results.items():
+            print_summary(name, data)
+
+if __name__ == '__main__':
+    main()
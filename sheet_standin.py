@@ -0,0 +1,250 @@
+"""Local stand-in for a published Google Sheet, for benchmarking sheet refreshes.
+
+    python sheet_standin.py --rows 50000 --latency 0.2 --port 8765
+
+Serves synthetic patient CSVs at the published-sheet URL shape, e.g.
+
+    http://127.0.0.1:8765/spreadsheets/d/e/<key>/pub?gid=0&single=true&output=csv
+
+so the dashboard can be pointed at it with GOOGLE_SHEETS_CSV_URL, or through
+/api/update-sheets-url or /api/datasets once SHEETS_URL_PREFIXES includes the
+stand-in. Payload size, latency, ETag behaviour and error/timeout injection
+are set on the command line and can be changed while running with POST
+/control (a JSON object of settings); GET /control returns the settings and
+request counters.
+
+ETag modes:
+    strong  stable ETag, answers If-None-Match with 304
+    none    no ETag header, always sends the full body
+    rotate  the sheet is edited before every request (new body and ETag)
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+ETAG_MODES = ('strong', 'none', 'rotate')
+
+FIRST_NAMES = ['Jena', 'Mark', 'Anthony', 'David', 'Alan', 'Sue', 'Priya', 'Rahul', 'Anita', 'Vikram', 'Meera', 'Arjun']
+LAST_NAMES = ['Brinsker', 'Hay', 'Davie', 'Perry', 'Gilchrist', 'Woodger', 'Sharma', 'Patel', 'Iyer', 'Khan', 'Das', 'Rao']
+DOCTORS = ['Dr Kenny Josh', 'Dr Mark', 'Dr Cinnabar', 'Dr Felix', 'Dr Beryl', 'Dr Joshep', 'Dr Jayesh', 'Dr Sharma']
+DISEASES = ['influenza', 'asthma', 'diabetes', 'jaundice', 'malaria', 'hepatitis', 'typhoid', 'dengue']
+GENDERS = ['Male', 'Female', 'Other']
+CITIES = ['Mumbai, Maharashtra', 'Delhi, Delhi', 'Bangalore, Karnataka', 'Chennai, Tamil Nadu',
+          'Hyderabad, Telangana', 'Pune, Maharashtra', 'Kolkata, West Bengal', 'Jaipur, Rajasthan']
+
+def generate_patients_csv(rows, seed=0, invalid_rate=0.0, years=3):
+    """Build a synthetic patients CSV in the sheet's column layout"""
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now().normalize()
+    admit = end - pd.to_timedelta(rng.integers(0, years * 365, rows), unit='D')
+    stay = rng.integers(1, 30, rows)
+    discharge = (admit + pd.to_timedelta(stay, unit='D')).strftime('%Y-%m-%d').to_numpy(dtype=object)
+    # Patients admitted in the last month are mostly still in
+    discharge[(admit > end - pd.Timedelta(days=30)) & (rng.random(rows) < 0.7)] = ''
+
+    df = pd.DataFrame({
+        'name': np.char.add(np.char.add(np.array(FIRST_NAMES)[rng.integers(0, len(FIRST_NAMES), rows)], ' '),
+                            np.array(LAST_NAMES)[rng.integers(0, len(LAST_NAMES), rows)]),
+        'doctor': np.array(DOCTORS)[rng.integers(0, len(DOCTORS), rows)],
+        'admitDate': admit.strftime('%Y-%m-%d'),
+        'disease': np.array(DISEASES)[rng.integers(0, len(DISEASES), rows)],
+        'roomNo': rng.integers(101, 500, rows).astype(str),
+        'age': rng.integers(0, 95, rows),
+        'gender': np.array(GENDERS)[rng.choice(len(GENDERS), rows, p=[0.49, 0.49, 0.02])],
+        'phone': (9000000000 + rng.integers(0, 999999999, rows)).astype(str),
+        'address': np.array(CITIES)[rng.integers(0, len(CITIES), rows)],
+        'dischargeDate': discharge
+    })
+
+    if invalid_rate > 0:
+        # Exercise the validation path with out-of-range ages and unparseable dates
+        bad = rng.random(rows) < invalid_rate
+        df['age'] = df['age'].astype(object)
+        df.loc[bad, 'age'] = -1
+        df.loc[bad & (rng.random(rows) < 0.5), 'admitDate'] = 'not a date'
+
+    return df.to_csv(index=False)
+
+class SheetStandIn:
+    """Settings, payload and counters shared by all request handler threads"""
+
+    def __init__(self, rows=1000, seed=0, invalid_rate=0.0, latency=0.0, jitter=0.0,
+                 etag_mode='strong', error_rate=0.0, error_status=500, timeout_rate=0.0, hang=30.0):
+        self.lock = threading.Lock()
+        self.settings = {}
+        self.revision = 0
+        self.counters = {'requests': 0, 'full': 0, 'not_modified': 0, 'errors': 0, 'timeouts': 0}
+        self.configure(rows=rows, seed=seed, invalid_rate=invalid_rate, latency=latency, jitter=jitter,
+                       etag_mode=etag_mode, error_rate=error_rate, error_status=error_status,
+                       timeout_rate=timeout_rate, hang=hang)
+
+    def configure(self, **settings):
+        """Update settings, regenerating the payload if its shape changed"""
+        unknown = set(settings) - {'rows', 'seed', 'invalid_rate', 'latency', 'jitter', 'etag_mode',
+                                   'error_rate', 'error_status', 'timeout_rate', 'hang'}
+        if unknown:
+            raise ValueError(f'Unknown settings: {sorted(unknown)}')
+        if settings.get('etag_mode', 'strong') not in ETAG_MODES:
+            raise ValueError(f'etag_mode must be one of {ETAG_MODES}')
+
+        with self.lock:
+            previous = dict(self.settings)
+            self.settings.update(settings)
+            payload_keys = ('rows', 'seed', 'invalid_rate')
+            if any(previous.get(key) != self.settings[key] for key in payload_keys):
+                text = generate_patients_csv(self.settings['rows'], self.settings['seed'], self.settings['invalid_rate'])
+                # Keep the header and first row apart so an edit only rewrites the first row
+                header, first, rest = text.split('\n', 2)
+                self.header = header.encode('utf-8') + b'\n'
+                self.first_row = first.split(',', 1)
+                self.rest = rest.encode('utf-8')
+                self.revision = 0
+            return dict(self.settings)
+
+    def describe(self):
+        with self.lock:
+            return {'settings': dict(self.settings), 'revision': self.revision,
+                    'payload_bytes': len(self.header) + len(self.rest), 'counters': dict(self.counters)}
+
+    def count(self, key):
+        with self.lock:
+            self.counters[key] += 1
+
+    def next_payload(self):
+        """Return (body, etag) for the next request, editing the sheet in rotate mode"""
+        with self.lock:
+            self.counters['requests'] += 1
+            if self.settings['etag_mode'] == 'rotate':
+                self.revision += 1
+            name, others = self.first_row
+            suffix = f' r{self.revision}' if self.revision else ''
+            body = self.header + f'{name}{suffix},{others}\n'.encode('utf-8') + self.rest
+            etag = None
+            if self.settings['etag_mode'] != 'none':
+                etag = '"' + hashlib.sha1(f"{self.settings['rows']}:{self.settings['seed']}:{self.revision}".encode()).hexdigest() + '"'
+            return body, etag, dict(self.settings)
+
+class SheetRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_body(self, status, body, content_type='text/csv; charset=utf-8', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def send_json(self, data, status=200):
+        self.send_body(status, json.dumps(data).encode('utf-8'), 'application/json')
+
+    def is_sheet_request(self, url):
+        # /spreadsheets/d/e/<key>/pub?...&output=csv, as published sheets are linked
+        parts = url.path.strip('/').split('/')
+        query = parse_qs(url.query)
+        return (len(parts) == 5 and parts[:3] == ['spreadsheets', 'd', 'e'] and parts[4] == 'pub'
+                and query.get('output') == ['csv'])
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/control':
+            self.send_json(self.server.standin.describe())
+            return
+        if not self.is_sheet_request(url):
+            self.send_body(404, b'Not Found', 'text/plain')
+            return
+
+        body, etag, settings = self.server.standin.next_payload()
+
+        if random.random() < settings['timeout_rate']:
+            # Hold the connection without answering so the client's timeout fires
+            self.server.standin.count('timeouts')
+            time.sleep(settings['hang'])
+            self.close_connection = True
+            return
+
+        delay = settings['latency'] + random.uniform(0, settings['jitter'])
+        if delay > 0:
+            time.sleep(delay)
+
+        if random.random() < settings['error_rate']:
+            self.server.standin.count('errors')
+            self.send_body(settings['error_status'], b'Injected error', 'text/plain')
+            return
+
+        if etag is not None and self.headers.get('If-None-Match') == etag:
+            self.server.standin.count('not_modified')
+            self.send_body(304, b'', headers={'ETag': etag})
+            return
+
+        self.server.standin.count('full')
+        self.send_body(200, body, headers={'ETag': etag} if etag else None)
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/control':
+            self.send_body(404, b'Not Found', 'text/plain')
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            settings = json.loads(self.rfile.read(length) or b'{}')
+            self.send_json({'settings': self.server.standin.configure(**settings)})
+        except (ValueError, TypeError) as e:
+            self.send_json({'error': str(e)}, 400)
+
+def start_standin(host='127.0.0.1', port=0, verbose=False, **settings):
+    """Start a stand-in on a background thread; returns (server, sheet_url)"""
+    server = ThreadingHTTPServer((host, port), SheetRequestHandler)
+    server.daemon_threads = True
+    server.standin = SheetStandIn(**settings)
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, name='sheet-standin', daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f'http://{host}:{port}/spreadsheets/d/e/standin/pub?gid=0&single=true&output=csv'
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve synthetic patient CSVs shaped like a published Google Sheet')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rows', type=int, default=1000, help='patients in the sheet')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--invalid-rate', type=float, default=0.0, help='fraction of rows that fail validation')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before each response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='extra random latency, up to this many seconds')
+    parser.add_argument('--etag-mode', choices=ETAG_MODES, default='strong')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with --error-status')
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='fraction of requests left hanging')
+    parser.add_argument('--hang', type=float, default=30.0, help='seconds a hanging request is held')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+
+    settings = vars(args)
+    host, port, verbose = settings.pop('host'), settings.pop('port'), settings.pop('verbose')
+    server, url = start_standin(host, port, verbose, **settings)
+    print(f"Sheet stand-in serving {args.rows} patients at {url}")
+    print(f"  GOOGLE_SHEETS_CSV_URL={url}")
+    print(f"  SHEETS_URL_PREFIXES=https://docs.google.com/spreadsheets/,http://{host}:{port}/spreadsheets/")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Production WSGI entry point for gunicorn.
+
+    gunicorn wsgi:application
+
+gunicorn.conf.py (picked up from the working directory) sets preload_app, so
+this module is imported once in the gunicorn master. The dataset is loaded,
+validated and its derived caches (KPIs, room and identity indexes, analytics)
+are built before any worker forks, so every worker starts warm and shares
+those pages copy-on-write instead of fetching and parsing the sheet itself.
+gc.freeze() then keeps the collector in each worker from touching, and so
+copying, the preloaded objects.
+
+The master keeps its preloaded copy so recycled workers also start warm. With
+the single worker gunicorn.conf.py allows, that copy stays shared only until
+the worker's first write to patients_df or its replacement: after an edit,
+upload or sheet refresh the master's frame is a stale second copy, so plan for
+up to twice the dataset's memory. A worker forked after such a change restores
+the current data from the journal before serving (prepare_worker).
+"""
+
+import gc
+
+import app as dashboard
+
+application = dashboard.app
+
+# Journal sequence number and data version the master preloaded, so a
+# worker forked later can tell whether it must catch up
+preloaded_seq = None
+preloaded_version = None
+
+def preload():
+    """Load and warm the dataset in the master before workers fork"""
+    global preloaded_seq, preloaded_version
+
+    dashboard.initialize_data()
+    dashboard.warm_caches()
+
+    journal = dashboard.get_journal()
+    preloaded_seq = journal.last_seq if journal is not None else None
+    preloaded_version = dashboard.data_version
+    # Release the single-writer journal lock for the worker
+    dashboard.close_journal()
+
+    gc.collect()
+    gc.freeze()
+    print(f"Preloaded {len(dashboard.patients_df) if dashboard.patients_df is not None else 0} patients for workers")
+
+def after_fork():
+    """Reset per-process state a worker inherits from the master"""
+    # The master's journal flusher thread does not exist in the child; the
+    # worker opens its own journal on first use
+    dashboard.journal = None
+    dashboard.compaction_thread = None
+    dashboard.revalidation_thread = None
+
+def prepare_worker():
+    """Catch up with edits journaled since the preload, then make sure caches are warm"""
+    journal = dashboard.get_journal()
+    if journal is not None and preloaded_seq is not None and journal.last_seq > preloaded_seq:
+        # A recycled worker's predecessor journaled edits, or replaced the
+        # dataset (which advances the sequence too), after the preload
+        dashboard.restore_patients_from_journal(include_sample=True)
+
+    if dashboard.data_version != preloaded_version:
+        dashboard.warm_caches()
+
+preload()